@@ -0,0 +1,98 @@
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+# Interval name -> bucket length in seconds
+INTERVALS = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}
+# Candles kept per interval and symbol; older ones fall off the ring
+CANDLE_WINDOW = 500
+
+# Buckets line up with the local clock (so the 1d candle starts at local midnight)
+_UTC_OFFSET = datetime.now().astimezone().utcoffset().total_seconds()
+
+class _Series:
+    """OHLC rings for one interval: (symbols x window) arrays plus the bucket start times."""
+    def __init__(self, seconds: int, n_symbols: int, window: int):
+        self.seconds = seconds
+        self.window = window
+        self.starts = np.zeros(window, dtype=np.float64)
+        self.open = np.zeros((n_symbols, window), dtype=np.float64)
+        self.high = np.zeros((n_symbols, window), dtype=np.float64)
+        self.low = np.zeros((n_symbols, window), dtype=np.float64)
+        self.close = np.zeros((n_symbols, window), dtype=np.float64)
+        self.ticks = np.zeros(window, dtype=np.int64)
+        self.pos = -1 # Slot of the current (open) candle
+        self.size = 0
+
+    def bucket(self, timestamp: float) -> float:
+        return (timestamp + _UTC_OFFSET) // self.seconds * self.seconds - _UTC_OFFSET
+
+    def add(self, timestamp: float, prices: np.ndarray):
+        start = self.bucket(timestamp)
+        pos = self.pos
+        if pos < 0 or start > self.starts[pos]:
+            # New bucket: open a fresh candle in the next slot
+            pos = self.pos = (pos + 1) % self.window
+            self.size = min(self.size + 1, self.window)
+            self.starts[pos] = start
+            self.open[:, pos] = prices
+            self.high[:, pos] = prices
+            self.low[:, pos] = prices
+            self.close[:, pos] = prices
+            self.ticks[pos] = 1
+            return
+        np.maximum(self.high[:, pos], prices, out=self.high[:, pos])
+        np.minimum(self.low[:, pos], prices, out=self.low[:, pos])
+        self.close[:, pos] = prices
+        self.ticks[pos] += 1
+
+    def order(self, limit: int) -> np.ndarray:
+        """Ring slots of the last `limit` candles, oldest first."""
+        count = min(limit, self.size)
+        return np.arange(self.pos - count + 1, self.pos + 1) % self.window
+
+class CandleBuilder:
+    """
+    Folds every market tick into OHLC candles for each interval in INTERVALS.
+    A tick is a handful of vectorized ops per interval (O(1) per symbol), and each interval keeps
+    only the last `window` candles. Reads come back columnar: one list per field.
+    """
+    def __init__(self, n_symbols: int, intervals: Optional[Dict[str, int]] = None, window: int = CANDLE_WINDOW):
+        self._series = {name: _Series(seconds, n_symbols, window) for name, seconds in (intervals or INTERVALS).items()}
+        self._lock = threading.Lock()
+
+    @property
+    def intervals(self):
+        return list(self._series)
+
+    def add(self, timestamp: float, prices: np.ndarray):
+        with self._lock:
+            for series in self._series.values():
+                series.add(timestamp, prices)
+
+    def current(self, row: int, interval: str = "1d") -> Optional[dict]:
+        """The candle still being built for one symbol, or None before the first tick."""
+        series = self._series[interval]
+        with self._lock:
+            pos = series.pos
+            if pos < 0:
+                return None
+            return {"t": float(series.starts[pos]), "open": float(series.open[row, pos]), "high": float(series.high[row, pos]),
+                    "low": float(series.low[row, pos]), "close": float(series.close[row, pos])}
+
+    def candles(self, row: int, interval: str, limit: int = CANDLE_WINDOW) -> dict:
+        """Last `limit` candles for one symbol as columns. Raises KeyError for unknown intervals."""
+        series = self._series[interval]
+        with self._lock:
+            slots = series.order(limit)
+            columns = {
+                "t": series.starts[slots].tolist(),
+                "open": np.round(series.open[row, slots], 2).tolist(),
+                "high": np.round(series.high[row, slots], 2).tolist(),
+                "low": np.round(series.low[row, slots], 2).tolist(),
+                "close": np.round(series.close[row, slots], 2).tolist(),
+                "ticks": series.ticks[slots].tolist(),
+            }
+        return columns
@@ -1,11 +1,20 @@
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+from . import services
+from .ledger import LedgerStore
+from .portfolio import PortfolioStore
+
+DEFAULT_AVG_MONTHLY_SPEND = 35000.00
+# Portfolio values move every tick; the chat context re-values them at most this often
+PORTFOLIO_CONTEXT_TTL = 60 # seconds
 
 class FinanceEngine:
-    def __init__(self):
-        # Initial balance set to 0 as requested by user
-        self.current_balance = 0.00
+    def __init__(self, ledger: Optional[LedgerStore] = None, portfolio: Optional[PortfolioStore] = None):
+        # Ledger and balance persist in the Vault database (balance starts at 0 on a fresh install)
+        self.ledger = ledger or LedgerStore(services.get_vault())
+        self.portfolio = portfolio or PortfolioStore(services.get_vault(), services.get_market_engine())
         # Mock Data (In real app, this comes from the local SQLite Vault)
-        self.avg_monthly_spend = 35000.00
         self.upcoming_bills = [
             {"name": "Rent", "amount": 25000.00, "due_date": "2024-01-05"},
             {"name": "Electricity", "amount": 2400.00, "due_date": "2024-01-10"},
@@ -22,41 +31,87 @@ class FinanceEngine:
             {"name": "State Education Grant", "amount": 12000.00, "criteria": "Resident"},
             {"name": "Tech Future Fund", "amount": 8000.00, "criteria": "CS Major"},
         ]
-        self.ledger_history = [] # List of {date, description, amount, type: IN/OUT}
+        # Static mock lists - totals are summed once, not per request
+        self.total_bills = sum(bill["amount"] for bill in self.upcoming_bills)
+        self.total_subscriptions = sum(sub["amount"] for sub in self.subscriptions)
+        # Bumped on every change to balance/ledger; caches key on it
+        self.version = 0
+        self._context_cache = (None, "") # (cache key, rendered context)
+
+    def _bump(self):
+        self.version += 1
+
+    @property
+    def current_balance(self) -> float:
+        return self.ledger.balance
+
+    @property
+    def avg_monthly_spend(self) -> float:
+        """Spend per month over the last 3 months of ledger data; the old demo figure until there is data."""
+        spend = self.ledger.rollup.avg_monthly_spend()
+        return spend if spend is not None else DEFAULT_AVG_MONTHLY_SPEND
+
+    def set_balance(self, amount: float):
+        """Overwrites the balance (e.g. synced from an uploaded statement)."""
+        self.ledger.set_balance(amount)
+        self._bump()
 
     def add_transaction(self, description: str, amount: float, type: str):
         """Adds a clean transaction to the ledger and updates balance."""
-        entry = {
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "description": description,
-            "amount": amount,
-            "type": type # 'IN' or 'OUT'
-        }
-        self.ledger_history.append(entry)
-        
-        if type == "IN":
-            self.current_balance += amount
-        elif type == "OUT":
-            self.current_balance -= amount
-            
+        entry = self.ledger.append(description, amount, type) # type: 'IN' or 'OUT'
+        self._bump()
         return entry
 
-    def get_ledger(self):
+    def add_transactions_bulk(self, rows):
+        """Adds many (date, description, amount, type) rows at once - one transaction, one version bump."""
+        result = self.ledger.append_many(rows)
+        self._bump()
+        return result
+
+    def get_ledger(self, limit: int = 50, before_id: Optional[int] = None):
+        page = self.ledger.page(limit=limit, before_id=before_id) # Newest first
         return {
             "balance": self.current_balance,
-            "history": self.ledger_history[::-1] # Newest first
+            "history": page["history"],
+            "next_cursor": page["next_cursor"],
         }
 
     def clear_ledger(self):
         """Resets the ledger transaction history and balance."""
-        self.ledger_history = []
-        self.current_balance = 0.00
+        self.ledger.clear()
+        self._bump()
         return {"status": "cleared", "message": "Ledger history and balance reset."}
 
+    def get_chat_context(self) -> str:
+        """
+        All the skill reports the chat prompt needs, joined into one block.
+        Rendered once per data version instead of on every /chat (portfolio values refresh every PORTFOLIO_CONTEXT_TTL).
+        The date is part of the key too: avg_monthly_spend is a window ending today.
+        """
+        key = (self.version, self.portfolio.version, date.today(), int(time.time() // PORTFOLIO_CONTEXT_TTL))
+        cached_key, context = self._context_cache
+        if cached_key == key:
+            return context
+
+        context = "\n\n".join([
+            self.get_financial_context(),
+            self.get_subscription_report(),
+            self.get_investment_options(),
+            self.portfolio.get_context(),
+            self.get_loan_offers(),
+            self.get_scholarship_opportunities(),
+        ])
+        self._context_cache = (key, context)
+        return context
+
+    def get_safe_to_spend(self) -> float:
+        """Balance left after the upcoming bills are paid."""
+        return self.current_balance - self.total_bills
+
     def get_financial_context(self) -> str:
         """Returns a string summary of financial health for the AI."""
-        total_bills = sum(bill["amount"] for bill in self.upcoming_bills)
-        safe_to_spend = self.current_balance - total_bills
+        total_bills = self.total_bills
+        safe_to_spend = self.get_safe_to_spend()
         
         bills_summary = ", ".join([f"{b['name']} (Rs {b['amount']})" for b in self.upcoming_bills])
         
@@ -65,6 +120,7 @@ class FinanceEngine:
             f"- Current Balance: Rs {self.current_balance}\n"
             f"- Upcoming Bills (Must Pay): {bills_summary} Total: Rs {total_bills}\n"
             f"- Safe-to-Spend (Free Cash): Rs {safe_to_spend}\n"
+            f"- Avg Monthly Spend: Rs {self.avg_monthly_spend}\n"
             f"- Rule: REJECT any purchase > Safe-to-Spend. ALERT if purchase eats into Bill money."
         )
 
@@ -97,7 +153,7 @@ class FinanceEngine:
             "- Low Risk: Nifty 50 Index Fund (12% avg return)\n"
             "- Medium Risk: Bluechip Tech Stocks (TCS, Infosys) (15-18% potential)\n"
             "- High Risk: Small Cap Discovery Fund (25%+ potential, high volatility)\n"
-            "Reference available cash: Rs {safe_to_spend}"
+            f"Reference available cash: Rs {self.get_safe_to_spend()}"
         )
 
     def get_loan_offers(self) -> str:
@@ -111,8 +167,8 @@ class FinanceEngine:
         )
 
     def get_summary(self) -> dict:
-        total_bills = sum(bill["amount"] for bill in self.upcoming_bills)
-        total_subs = sum(sub["amount"] for sub in self.subscriptions)
+        total_bills = self.total_bills
+        total_subs = self.total_subscriptions
         # Assuming avg spend includes bills/subs, let's just make a simple breakdown for the chart
         # Balance = 85k
         # Bills = 28.6k
@@ -122,6 +178,7 @@ class FinanceEngine:
         
         return {
             "current_balance": self.current_balance,
+            "avg_monthly_spend": self.avg_monthly_spend,
             "breakdown": [
                 {"name": "Bills", "value": total_bills},
                 {"name": "Subscriptions", "value": total_subs},
@@ -129,5 +186,3 @@ class FinanceEngine:
             ],
             "safe_to_spend": safe_to_spend
         }
-
-finance_engine = FinanceEngine()
@@ -1,41 +1,209 @@
-import google.generativeai as genai
+import asyncio
 import os
-from dotenv import load_dotenv
+import random
+import time
+from typing import AsyncIterator, Callable, Dict, Optional
+from .metrics import metrics, SPAN_METRIC
 
-load_dotenv()
+DEFAULT_MODEL = 'gemini-flash-latest'
+KEYED_MODEL = 'gemini-2.5-flash' # Model used when the UI passes its own key
+
+# Exceptions worth retrying: timeouts, rate limits, 5xx. Anything else (bad key, blocked prompt) fails fast.
+TRANSIENT_ERRORS = {
+    "TimeoutError", "ConnectionError", "ResourceExhausted", "ServiceUnavailable",
+    "DeadlineExceeded", "InternalServerError", "TooManyRequests", "Aborted",
+}
+
+def _genai():
+    # The SDK takes most of a second to import; only pay for it when a real model is used
+    import google.generativeai as genai
+    return genai
+
+def _is_transient(error: Exception) -> bool:
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+class FakeGeminiModel:
+    """
+    Local stand-in for genai.GenerativeModel with configurable latency.
+    Enabled with GEMINI_FAKE_LATENCY=<seconds>; handy for load tests without API quota.
+    """
+    def __init__(self, latency: float = 0.5, reply: str = "Noted, USER_A. Stay within your Safe-to-Spend."):
+        self.latency = latency
+        self.reply = reply
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        if stream:
+            return self._stream()
+        await asyncio.sleep(self.latency)
+        return _FakeResponse(self.reply)
+
+    async def _stream(self):
+        # Spread the latency over the words, like a real token stream
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.latency / len(words))
+            yield _FakeResponse(word if i == 0 else " " + word)
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
 
 class GeminiClient:
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 4, timeout: float = 60.0, max_retries: int = 2,
+                 backoff: float = 0.5, model_factory: Optional[Callable[[str], object]] = None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._model_factory = model_factory or (lambda name: _genai().GenerativeModel(name))
+        self._models: Dict[tuple, object] = {} # (api_key, model_name) -> model, built once each
+        self._configured_key: Optional[str] = None
+        self.model_name: Optional[str] = None # Part of the response cache key
+
+        fake_latency = os.getenv("GEMINI_FAKE_LATENCY")
+        if fake_latency:
+            self.use_model(FakeGeminiModel(float(fake_latency)), "fake")
+            return
+
         # In a real app, this comes from secure storage or env
-        # For this prototype, we'll try to load from env, else use the provided key temporarily if needed
         api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-             # Fallback for the hackathon demo if .env isn't set up yet by the user manually
-             # Ideally this is passed during init
-             pass
-        
         if api_key:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-flash-latest')
+            self.model = self._get_model(api_key, DEFAULT_MODEL)
+            self.model_name = DEFAULT_MODEL
         else:
             self.model = None
 
+    def _get_model(self, api_key: str, model_name: str):
+        key = (api_key, model_name)
+        if key not in self._models:
+            self._models[key] = self._model_factory(model_name)
+        # genai keeps its credentials globally, only touch them when the key actually changes
+        if api_key != self._configured_key:
+            _genai().configure(api_key=api_key)
+            self._configured_key = api_key
+        return self._models[key]
+
     def configure(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = self._get_model(api_key, KEYED_MODEL)
+        self.model_name = KEYED_MODEL
+
+    def use_model(self, model, model_name: str = "custom"):
+        """Swaps in any object with generate_content(_async) - e.g. FakeGeminiModel."""
+        self.model = model
+        self.model_name = model_name
 
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _call_model(self, model, prompt: str):
+        """One model call under the concurrency cap and the timeout."""
+        if hasattr(model, "generate_content_async"):
+            async with self.semaphore:
+                return await asyncio.wait_for(model.generate_content_async(prompt), self.timeout)
+
+        # Sync-only models run in a worker thread so the event loop stays free. A thread can't be
+        # cancelled, so on timeout its slot stays taken until it actually returns - otherwise
+        # timed-out calls would pile up beyond max_concurrency.
+        semaphore = self.semaphore
+        await semaphore.acquire()
+        call = asyncio.ensure_future(asyncio.to_thread(model.generate_content, prompt))
+
+        def release(done: asyncio.Future):
+            semaphore.release()
+            if not done.cancelled():
+                done.exception() # Mark a late failure as seen; the caller already gave up on it
+
+        call.add_done_callback(release)
+        return await asyncio.wait_for(asyncio.shield(call), self.timeout)
+
+    @staticmethod
+    def _full_prompt(prompt: str, system_instruction: str = None) -> str:
+        if system_instruction:
+            return f"{system_instruction}\n\nUser: {prompt}"
+        return prompt
+
+    @metrics.timed("gemini.generate")
     async def generate_response(self, prompt: str, system_instruction: str = None) -> str:
-        if not self.model:
+        model = self.model
+        if not model:
             return "Error: API Key not configured."
-        
-        full_prompt = prompt
-        if system_instruction:
-            full_prompt = f"{system_instruction}\n\nUser: {prompt}"
 
-        try:
-            response = self.model.generate_content(full_prompt)
-            return response.text
-        except Exception as e:
-            return f"AI Error: {str(e)}"
+        full_prompt = self._full_prompt(prompt, system_instruction)
+
+        attempt = 0
+        while True:
+            try:
+                response = await self._call_model(model, full_prompt)
+                return response.text
+            except Exception as e:
+                if attempt < self.max_retries and _is_transient(e):
+                    # Exponential backoff with jitter so retries from parallel requests spread out
+                    delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                    attempt += 1
+                    metrics.inc("pennywise_gemini_retries_total", error=type(e).__name__)
+                    print(f"DEBUG: Gemini transient error ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                metrics.inc("pennywise_gemini_errors_total", error=type(e).__name__)
+                if isinstance(e, asyncio.TimeoutError):
+                    return f"AI Error: request timed out after {self.timeout}s"
+                return f"AI Error: {str(e)}"
+
+    async def stream_response(self, prompt: str, system_instruction: str = None,
+                              status: Optional[dict] = None) -> AsyncIterator[str]:
+        """
+        Yields the reply as text chunks while the model generates it.
+        The concurrency slot is held for the whole stream and the timeout applies to
+        each chunk. Errors are yielded as text, same as generate_response; if a dict is
+        passed as `status`, status["failed"] is set too, since an error can follow partial output.
+        """
+        if status is not None:
+            status["failed"] = False
+        model = self.model
+        if not model:
+            if status is not None:
+                status["failed"] = True
+            yield "Error: API Key not configured."
+            return
+
+        if not hasattr(model, "generate_content_async"):
+            # No streaming API on this model - fall back to one chunk
+            text = await self.generate_response(prompt, system_instruction)
+            if status is not None:
+                status["failed"] = text.startswith(("AI Error", "Error:"))
+            yield text
+            return
 
-gemini_client = GeminiClient()
+        full_prompt = self._full_prompt(prompt, system_instruction)
+        start = time.perf_counter()
+        first_chunk = True
+        async with self.semaphore:
+            try:
+                stream = await asyncio.wait_for(model.generate_content_async(full_prompt, stream=True), self.timeout)
+                chunks = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    if chunk.text:
+                        if first_chunk:
+                            metrics.observe(SPAN_METRIC, time.perf_counter() - start, span="gemini.stream.first_chunk")
+                            first_chunk = False
+                        yield chunk.text
+            except asyncio.TimeoutError:
+                metrics.inc("pennywise_gemini_errors_total", error="TimeoutError")
+                if status is not None:
+                    status["failed"] = True
+                yield f"AI Error: request timed out after {self.timeout}s"
+            except Exception as e:
+                metrics.inc("pennywise_gemini_errors_total", error=type(e).__name__)
+                if status is not None:
+                    status["failed"] = True
+                yield f"AI Error: {str(e)}"
+        metrics.observe(SPAN_METRIC, time.perf_counter() - start, span="gemini.stream")
@@ -0,0 +1,176 @@
+import sqlite3
+import threading
+import pandas as pd
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from .rollups import LedgerRollup, parse_day
+from .transactions import categorize, categorize_one
+from .vault import Vault
+
+MAX_PAGE_SIZE = 500
+
+def _delta(amount: float, type: str) -> float:
+    """How a row moves the balance; anything but IN/OUT leaves it alone."""
+    return amount if type == "IN" else -amount if type == "OUT" else 0.0
+
+class LedgerStore:
+    """
+    Append-only cash book kept in the Vault database.
+    Every row stores the balance after it was applied, and the current balance lives in a
+    one-row `ledger_state` table updated in the same transaction, so reading it is O(1).
+    """
+    def __init__(self, vault: Vault):
+        self.vault = vault
+        self.vault.schema('''
+            CREATE TABLE IF NOT EXISTS ledger
+                (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 date TEXT,
+                 description TEXT,
+                 amount REAL,
+                 type TEXT,
+                 balance_after REAL);
+            CREATE INDEX IF NOT EXISTS idx_ledger_date ON ledger (date);
+            CREATE TABLE IF NOT EXISTS ledger_state
+                (id INTEGER PRIMARY KEY CHECK (id = 1),
+                 balance REAL);
+            INSERT OR IGNORE INTO ledger_state (id, balance) VALUES (1, 0);
+        ''')
+        with self.vault.reader() as conn:
+            self.balance = conn.execute("SELECT balance FROM ledger_state WHERE id = 1").fetchone()[0]
+        # Writes finish on the writer thread in order but their callers wake up in any order;
+        # each write takes a sequence number there, and only a newer one may replace self.balance
+        self._write_seq = 0
+        self._balance_seq = 0
+        self._balance_lock = threading.Lock()
+
+        # Aggregates are rebuilt once from the table, then kept up to date by every write.
+        # They are changed inside the write callbacks, which the writer thread runs in commit
+        # order, so an append and a clear can't be applied to them in the wrong order.
+        self.rollup = LedgerRollup()
+        with self.vault.reader() as conn:
+            self.rollup.add_many(self._roll_entries(conn.execute("SELECT date, description, amount, type FROM ledger").fetchall()))
+
+    def _next_seq(self) -> int:
+        # Only called from write callbacks, which the Vault runs one at a time on its writer thread
+        self._write_seq += 1
+        return self._write_seq
+
+    def _publish_balance(self, seq: int, balance: float):
+        with self._balance_lock:
+            if seq > self._balance_seq:
+                self._balance_seq = seq
+                self.balance = balance
+
+    def _roll_entry(self, date: str, description: str, amount: float, type: str) -> Optional[tuple]:
+        try:
+            day = parse_day(date)
+        except ValueError:
+            return None
+        category = categorize_one(description) if type == "OUT" else "Income"
+        return day, amount, type, category
+
+    def append(self, description: str, amount: float, type: str, date: Optional[str] = None) -> dict:
+        """Adds one transaction and moves the balance. Returns the stored entry."""
+        date = date or datetime.now().strftime("%Y-%m-%d %H:%M")
+        delta = _delta(amount, type)
+        entry = self._roll_entry(date, description, amount, type)
+
+        def write(conn: sqlite3.Connection):
+            balance = conn.execute("SELECT balance FROM ledger_state WHERE id = 1").fetchone()[0] + delta
+            cur = conn.execute(
+                "INSERT INTO ledger (date, description, amount, type, balance_after) VALUES (?, ?, ?, ?, ?)",
+                (date, description, amount, type, balance),
+            )
+            conn.execute("UPDATE ledger_state SET balance = ? WHERE id = 1", (balance,))
+            if entry is not None:
+                self.rollup.add(*entry)
+            return cur.lastrowid, balance, self._next_seq()
+
+        row_id, balance, seq = self.vault.transact(write)
+        self._publish_balance(seq, balance)
+        return {"id": row_id, "date": date, "description": description, "amount": amount,
+                "type": type, "balance_after": balance}
+
+    def append_many(self, rows: List[Tuple[str, str, float, str]]) -> dict:
+        """
+        Appends (date, description, amount, type) rows in a single transaction.
+        Running balances are computed in one pass and the balance row is written once.
+        """
+        if not rows:
+            return {"inserted": 0, "balance": self.balance}
+        # Categorized here; only the tree updates run on the writer thread
+        entries = self._roll_entries(rows)
+
+        def write(conn: sqlite3.Connection):
+            balance = conn.execute("SELECT balance FROM ledger_state WHERE id = 1").fetchone()[0]
+            values = []
+            for date, description, amount, type in rows:
+                balance += _delta(amount, type)
+                values.append((date, description, amount, type, balance))
+            conn.executemany(
+                "INSERT INTO ledger (date, description, amount, type, balance_after) VALUES (?, ?, ?, ?, ?)",
+                values,
+            )
+            conn.execute("UPDATE ledger_state SET balance = ? WHERE id = 1", (balance,))
+            self.rollup.add_many(entries)
+            return balance, self._next_seq()
+
+        balance, seq = self.vault.transact(write)
+        self._publish_balance(seq, balance)
+        return {"inserted": len(rows), "balance": balance}
+
+    def _roll_entries(self, rows) -> list:
+        """(day, amount, type, category) per row, with categories from one vectorized pass."""
+        if not rows:
+            return []
+        categories = categorize(pd.Series([r[1] for r in rows], dtype=object)).tolist()
+        days = {} # Rows share few distinct days; parse each once
+        entries = []
+        for (date, _, amount, type), category in zip(rows, categories):
+            day = days.get(date[:10])
+            if day is None:
+                try:
+                    day = days[date[:10]] = parse_day(date)
+                except ValueError:
+                    continue
+            entries.append((day, amount, type, category if type == "OUT" else "Income"))
+        return entries
+
+    def set_balance(self, amount: float):
+        """Overwrites the balance without a ledger row (e.g. synced from an uploaded statement)."""
+        def write(conn: sqlite3.Connection):
+            conn.execute("UPDATE ledger_state SET balance = ? WHERE id = 1", (amount,))
+            return self._next_seq()
+        self._publish_balance(self.vault.transact(write), amount)
+
+    def clear(self):
+        def write(conn: sqlite3.Connection):
+            conn.execute("DELETE FROM ledger")
+            conn.execute("UPDATE ledger_state SET balance = 0 WHERE id = 1")
+            self.rollup.reset()
+            return self._next_seq()
+        self._publish_balance(self.vault.transact(write), 0.0)
+
+    def page(self, limit: int = 50, before_id: Optional[int] = None) -> dict:
+        """Newest-first page of transactions, keyset-paginated on id."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        with self.vault.reader() as conn:
+            if before_id is None:
+                rows = conn.execute(
+                    "SELECT id, date, description, amount, type, balance_after FROM ledger ORDER BY id DESC LIMIT ?",
+                    (limit + 1,),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT id, date, description, amount, type, balance_after FROM ledger WHERE id < ? ORDER BY id DESC LIMIT ?",
+                    (before_id, limit + 1),
+                ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        history = [
+            {"id": r[0], "date": r[1], "description": r[2], "amount": r[3], "type": r[4], "balance_after": r[5]}
+            for r in rows
+        ]
+        return {"history": history, "next_cursor": rows[-1][0] if has_more else None}
@@ -0,0 +1,159 @@
+import csv
+import json
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Only the first errors are reported back; the counts are always exact
+MAX_REPORTED_ERRORS = 1000
+LEDGER_DATE_FORMAT = "%Y-%m-%d %H:%M"
+# Same byte cap as a statement upload (pdf_parser.MAX_PDF_BYTES); about 1M rows of typical CSV
+MAX_IMPORT_BYTES = 50 * 1024 * 1024
+MAX_IMPORT_ROWS = 1_000_000
+
+COLUMNS = ("date", "description", "amount", "type")
+Row = Tuple[str, str, float, str] # (date, description, amount, type)
+
+class ImportLimitError(ValueError):
+    """Raised when a bulk import exceeds its byte or row limit."""
+
+class LedgerImporter:
+    """
+    Incremental parser for bulk ledger uploads in CSV (header: date,description,amount,type)
+    or NDJSON (one {"date", "description", "amount", "type"} object per line).
+    Bytes are fed as they arrive; complete lines are validated in batches and partial lines
+    are carried over to the next chunk, so the body never has to be held in memory as text.
+    `type` may be omitted, in which case a negative amount means OUT.
+    Quoted CSV fields must not contain newlines.
+    """
+    def __init__(self, fmt: str, max_bytes: int = MAX_IMPORT_BYTES, max_rows: int = MAX_IMPORT_ROWS):
+        if fmt not in ("csv", "ndjson"):
+            raise ValueError(f"Unsupported format: {fmt}")
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.bytes_read = 0
+        self.rows: List[Row] = []
+        self.errors: List[dict] = []
+        self.failed = 0
+        self._line_no = 0
+        self._pending = b""
+        self._header: Optional[List[str]] = None
+        self._columns: List[Optional[int]] = []
+        self._width = 0
+        self._dates: Dict[str, str] = {}
+        self._now = datetime.now().strftime(LEDGER_DATE_FORMAT)
+
+    def feed(self, chunk: bytes):
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.max_bytes:
+            raise ImportLimitError(f"Import is larger than {self.max_bytes // (1024 * 1024)} MB")
+        data = self._pending + chunk
+        cut = data.rfind(b"\n")
+        if cut == -1:
+            self._pending = data
+            return
+        self._pending = data[cut + 1:]
+        self._process(data[:cut].decode("utf-8", errors="replace").split("\n"))
+
+    def finish(self):
+        if self._pending.strip():
+            self._process([self._pending.decode("utf-8", errors="replace")])
+        self._pending = b""
+
+    def _error(self, line_no: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def _process(self, lines: List[str]):
+        if self.fmt == "csv":
+            self._process_csv(lines)
+        else:
+            self._process_ndjson(lines)
+        if len(self.rows) + self.failed > self.max_rows:
+            raise ImportLimitError(f"Import has more than {self.max_rows} rows")
+
+    def _process_csv(self, lines: List[str]):
+        start_line = self._line_no
+        self._line_no += len(lines)
+        validate = self._validate
+        for offset, fields in enumerate(csv.reader(lines)):
+            if not fields or not "".join(fields).strip():
+                continue
+            line_no = start_line + offset + 1
+            if self._header is None:
+                self._read_header(fields)
+                continue
+            # Columns are looked up by position; short rows just read as empty
+            fields.extend([""] * (self._width - len(fields)))
+            validate(line_no, *[fields[i] if i is not None else None for i in self._columns])
+
+    def _read_header(self, fields: List[str]):
+        header = [f.strip().lower() for f in fields]
+        missing = {"description", "amount"} - set(header)
+        if missing:
+            raise ValueError(f"CSV header is missing: {', '.join(sorted(missing))}")
+        self._header = header
+        self._columns = [header.index(c) if c in header else None for c in COLUMNS]
+        self._width = len(header)
+
+    def _process_ndjson(self, lines: List[str]):
+        start_line = self._line_no
+        self._line_no += len(lines)
+        for offset, line in enumerate(lines):
+            line_no = start_line + offset + 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                self._error(line_no, f"invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                self._error(line_no, "expected a JSON object")
+                continue
+            self._validate(line_no, *[record.get(c) for c in COLUMNS])
+
+    def _normalize_date(self, raw_date: str) -> str:
+        # Bulk files repeat the same few dates, so each distinct value is parsed once
+        date = self._dates.get(raw_date)
+        if date is None:
+            date = self._dates[raw_date] = datetime.fromisoformat(raw_date).strftime(LEDGER_DATE_FORMAT)
+        return date
+
+    def _validate(self, line_no: int, date, description, amount, type):
+        description = str(description or "").strip()
+        if not description:
+            self._error(line_no, "description is required")
+            return
+
+        raw_amount = amount
+        try:
+            amount = float(str(amount if amount is not None else "").replace(",", ""))
+        except ValueError:
+            self._error(line_no, f"amount is not a number: {raw_amount!r}")
+            return
+        if not math.isfinite(amount):
+            self._error(line_no, "amount must be finite")
+            return
+
+        type = str(type or "").strip().upper()
+        if not type:
+            type = "OUT" if amount < 0 else "IN"
+        if type not in ("IN", "OUT"):
+            self._error(line_no, f"type must be IN or OUT, got {type!r}")
+            return
+        amount = abs(amount)
+
+        raw_date = str(date or "").strip()
+        if raw_date:
+            try:
+                date = self._normalize_date(raw_date)
+            except ValueError:
+                self._error(line_no, f"date is not ISO formatted: {raw_date!r}")
+                return
+        else:
+            date = self._now
+
+        self.rows.append((date, description, amount, type))
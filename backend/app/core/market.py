@@ -1,9 +1,49 @@
-import random
+import asyncio
+import json
+import threading
+import time
 from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from .candles import CANDLE_WINDOW, CandleBuilder
+from .metrics import metrics
+from .tick_history import HISTORY_CAPACITY, TickHistory, lttb
+
+# Prices advance this often, independent of how many clients are reading
+TICK_INTERVAL = 1.0 # seconds
+# Per-tick volatility of the GBM step (~0.05% per second), no drift
+TICK_SIGMA = 0.0005
+TICK_DRIFT = 0.0
+
+UP_COLOR = "#10b981"
+DOWN_COLOR = "#ef4444"
+
+# Default chart resolution for /market/{symbol}
+CHART_POINTS = 200
+MAX_CHART_POINTS = 2000
+
+# Numeric ticker fields that are diffed between snapshots for the live feed
+FEED_FIELDS = ("price", "change", "pct")
+
+class MarketSnapshot(NamedTuple):
+    """One tick's worth of market state. Never mutated once published."""
+    seq: int
+    timestamp: float
+    data: dict # {"tickers": [...], "news": [...]}
+    json: bytes # `data` serialized once, shared by every reader
+    columns: Dict[str, np.ndarray] # Rounded, read-only FEED_FIELDS arrays, for cheap diffs
 
 class MarketEngine:
-    def __init__(self):
-        self.tickers = [
+    """
+    Simulated market. Prices live in NumPy arrays (struct-of-arrays: price, change, pct),
+    and a background thread advances every ticker with one vectorized GBM step per tick.
+    Readers only ever see the latest immutable MarketSnapshot.
+    """
+    def __init__(self, tick_interval: float = TICK_INTERVAL, sigma: float = TICK_SIGMA, seed: Optional[int] = None,
+                 history_capacity: int = HISTORY_CAPACITY):
+        tickers = [
             {"symbol": "NIFTY", "name": "Nifty 50", "price": 21456.70, "change": 120.50, "pct": 0.56, "color": "#10b981"},
             {"symbol": "SENSEX", "name": "BSE Sensex", "price": 71200.45, "change": 350.20, "pct": 0.49, "color": "#10b981"},
             {"symbol": "BANKNIFTY", "name": "Bank Nifty", "price": 47800.10, "change": -110.00, "pct": -0.23, "color": "#ef4444"},
@@ -48,48 +88,198 @@ class MarketEngine:
             {"source": "CNBC", "headline": "Why Tech Stocks are becoming a safe haven", "time": "1d ago"},
         ]
 
+
+        self.symbols: List[str] = [t["symbol"] for t in tickers]
+        self.names: List[str] = [t["name"] for t in tickers]
+        self.index: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+
+        self.price = np.array([t["price"] for t in tickers], dtype=np.float64)
+        # Change is measured against the previous close, which stays fixed for the session
+        self.prev_close = self.price - np.array([t["change"] for t in tickers], dtype=np.float64)
+        self.change = self.price - self.prev_close
+        self.pct = self.change / self.prev_close * 100
+
+        self.tick_interval = tick_interval
+        self.sigma = sigma
+        self._rng = np.random.default_rng(seed)
+        self._seq = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[MarketSnapshot], None]] = []
+        self._listeners_lock = threading.Lock()
+        # Every tick is recorded; /market/{symbol} charts come from here
+        self.history = TickHistory(len(self.symbols), history_capacity)
+        self.candles = CandleBuilder(len(self.symbols))
+        self._snapshot = self._build_snapshot()
+        self._record(self._snapshot)
+
+    @metrics.timed("market.tick")
+    def step(self):
+        """Advances every ticker by one GBM step and publishes a new snapshot."""
+        shocks = self._rng.standard_normal(len(self.price))
+        self.price *= np.exp((TICK_DRIFT - 0.5 * self.sigma ** 2) + self.sigma * shocks)
+        np.subtract(self.price, self.prev_close, out=self.change)
+        np.divide(self.change, self.prev_close, out=self.pct)
+        self.pct *= 100
+        self._seq += 1
+        self._snapshot = self._build_snapshot()
+        self._record(self._snapshot)
+        self._notify(self._snapshot)
+
+    def _record(self, snapshot: MarketSnapshot):
+        self.history.record(snapshot.timestamp, self.price)
+        self.candles.add(snapshot.timestamp, self.price)
+
+    def _build_snapshot(self) -> MarketSnapshot:
+        columns = {"price": np.round(self.price, 2), "change": np.round(self.change, 2), "pct": np.round(self.pct, 2)}
+        for column in columns.values():
+            column.flags.writeable = False
+        prices, changes, pcts = (columns[f].tolist() for f in FEED_FIELDS)
+        tickers = [
+            {"symbol": s, "name": n, "price": p, "change": c, "pct": pc, "color": UP_COLOR if c >= 0 else DOWN_COLOR}
+            for s, n, p, c, pc in zip(self.symbols, self.names, prices, changes, pcts)
+        ]
+        data = {"tickers": tickers, "news": self.news_db}
+        return MarketSnapshot(self._seq, time.time(), data, json.dumps(data).encode(), columns)
+
+    def add_listener(self, listener: Callable[[MarketSnapshot], None]):
+        """listener(snapshot) is called on the tick thread after every step; keep it cheap."""
+        with self._listeners_lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[MarketSnapshot], None]):
+        with self._listeners_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self, snapshot: MarketSnapshot):
+        with self._listeners_lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"ERROR: Market listener failed: {e}")
+
+    def _run(self):
+        # Deadline-based so the tick rate doesn't drift with the time spent in step()
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            deadline += self.tick_interval
+            try:
+                self.step()
+            except Exception as e:
+                print(f"ERROR: Market tick failed: {e}")
+            self._stop.wait(max(0.0, deadline - time.monotonic()))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="market-ticker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def snapshot(self) -> MarketSnapshot:
+        return self._snapshot
+
     def get_market_data(self):
-        # Simulator: Randomly jitter the prices to make it feel "Live"
-        for t in self.tickers:
-            jitter = random.uniform(-0.5, 0.5)
-            t["price"] += jitter
-            t["price"] = round(t["price"], 2)
-            
-            # Update Change % logic roughly
-            t["change"] = round(t["change"] + jitter, 2)
-            t["pct"] = round((t["change"] / t["price"]) * 100, 2)
-            t["color"] = "#10b981" if t["change"] >= 0 else "#ef4444"
+        return self._snapshot.data
 
-        return {
-            "tickers": self.tickers,
-            "news": self.news_db
-        }
+    @metrics.timed("market.details")
+    def get_ticker_details(self, symbol: str, points: int = CHART_POINTS, window: Optional[float] = None):
+        """
+        Live info plus the recorded price series, LTTB-downsampled to at most `points` points.
+        `window` limits the chart to the last N seconds. Returns None for unknown symbols.
+        """
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        snapshot = self._snapshot
+        ticker_info = snapshot.data["tickers"][i]
+        today = self.candles.current(i, "1d")
+
+        since = snapshot.timestamp - window if window else None
+        times, prices = self.history.series(i, since=since)
+        times, prices = lttb(times, prices, max(3, min(points, MAX_CHART_POINTS)))
+        chart_data = [
+            {"t": t, "time": datetime.fromtimestamp(t).strftime("%H:%M:%S"), "price": p}
+            for t, p in zip(times.tolist(), np.round(prices, 2).tolist())
+        ]
 
-    def get_ticker_details(self, symbol: str):
-        # Generate a fake intraday chart
-        chart_data = []
-        base_price = next((t["price"] for t in self.tickers if t["symbol"] == symbol), 1000)
-        
-        current = base_price * 0.98 # Start slightly lower/higher
-        for i in range(50): # 50 points
-            current = current + random.uniform(-current*0.01, current*0.01)
-            chart_data.append({"time": f"{9+int(i/6)}:{i%6}0", "price": round(current, 2)})
-            
-        ticker_info = next((t for t in self.tickers if t["symbol"] == symbol), None)
-            
         return {
             "symbol": symbol,
             "info": ticker_info,
             "chart": chart_data,
             "about": f"{symbol} is a leading company in its sector. This is a mock description for PennyWise demo.",
             "key_stats": {
-                "Open": round(base_price * 0.99, 2),
-                "High": round(base_price * 1.02, 2),
-                "Low": round(base_price * 0.98, 2),
+                "Open": round(today["open"], 2),
+                "High": round(today["high"], 2),
+                "Low": round(today["low"], 2),
                 "Vol": "1.2M",
                 "P/E": "24.5",
                 "Mkt Cap": "12.4T"
             }
         }
 
-market_engine = MarketEngine()
+    @metrics.timed("market.candles")
+    def get_candles(self, symbol: str, interval: str = "1m", limit: int = CANDLE_WINDOW):
+        """Columnar OHLC candles for one symbol. None for unknown symbols, ValueError for unknown intervals."""
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        if interval not in self.candles.intervals:
+            raise ValueError(f"Unknown interval '{interval}', expected one of {', '.join(self.candles.intervals)}")
+        return {"symbol": symbol, "interval": interval, **self.candles.candles(i, interval, max(1, limit))}
+
+class MarketSubscription:
+    """
+    One live-feed client. Starts with a full snapshot of its symbols, then each `changes()` call
+    waits for the next tick and returns only the fields that differ from what this client last got.
+    A slow client skips ticks instead of queueing them - the diff is always against its own last view.
+    """
+    def __init__(self, engine: MarketEngine, symbols: Optional[Iterable[str]] = None):
+        self.engine = engine
+        wanted = [s for s in symbols if s in engine.index] if symbols else engine.symbols
+        self.symbols = list(dict.fromkeys(wanted))
+        self._idx = np.array([engine.index[s] for s in self.symbols], dtype=np.intp)
+        self._last: Optional[MarketSnapshot] = None
+        self._loop = asyncio.get_running_loop()
+        self._tick = asyncio.Event()
+        engine.add_listener(self._on_tick)
+
+    def _on_tick(self, _snapshot: MarketSnapshot):
+        # Runs on the tick thread; just wake the client's coroutine
+        self._loop.call_soon_threadsafe(self._tick.set)
+
+    def snapshot(self) -> dict:
+        snapshot = self._last = self.engine.snapshot()
+        tickers = snapshot.data["tickers"]
+        return {"seq": snapshot.seq, "tickers": [tickers[i] for i in self._idx], "news": snapshot.data["news"]}
+
+    async def changes(self) -> Optional[dict]:
+        """Next delta: {"seq", "tickers": {symbol: {field: value}}}, or None when nothing visible moved."""
+        await self._tick.wait()
+        self._tick.clear()
+        new, old = self.engine.snapshot(), self._last
+        self._last = new
+        if old is None:
+            return {"seq": new.seq, "tickers": {}}
+
+        changed: Dict[str, dict] = {}
+        for field in FEED_FIELDS:
+            now = new.columns[field][self._idx]
+            moved = np.flatnonzero(now != old.columns[field][self._idx])
+            for pos, value in zip(moved.tolist(), now[moved].tolist()):
+                changed.setdefault(self.symbols[pos], {})[field] = value
+        if not changed:
+            return None
+        return {"seq": new.seq, "tickers": changed}
+
+    def close(self):
+        self.engine.remove_listener(self._on_tick)
@@ -1,9 +1,26 @@
-from typing import Dict, Tuple, List
-from .pii_patterns import PATTERNS, TOKEN_PREFIXES
-import re
+from collections import OrderedDict
+from typing import Dict, Tuple, List, Iterable, Iterator, Optional
+import threading
+import time
+from .metrics import metrics
+from .pii_patterns import SCANNER, SCAN_ORDER, TOKEN_PREFIXES, TOKEN_PATTERN, PARTIAL_TOKEN_PATTERN
+
+NAME_FALSE_POSITIVES = {"bank statement", "transaction id", "credit card"}
+DEFAULT_SESSION = "default"
+SCAN_RANK = {pii_type: rank for rank, pii_type in enumerate(SCAN_ORDER)}
+
+def _token_suffix(n: int) -> str:
+    """1 -> A, 26 -> Z, 27 -> AA, 28 -> AB ... (bijective base-26, never runs out)."""
+    letters = []
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        letters.append(chr(65 + rem))
+    return "".join(reversed(letters))
 
 class MaskingEngine:
-    def __init__(self):
+    def __init__(self, max_tokens: Optional[int] = None):
+        # Upper bound on remembered tokens; the oldest ones are forgotten first
+        self.max_tokens = max_tokens
         self.reset()
 
     def reset(self):
@@ -15,55 +32,187 @@ class MaskingEngine:
     def _get_token(self, pii_type: str, original_text: str) -> str:
         """Get or create a consistent token for a specific PII string."""
         if original_text in self.reverse_mapping:
-            return self.reverse_mapping[original_text]
+            token = self.reverse_mapping[original_text]
+            if self.max_tokens is not None:
+                # Used again, so it is the newest now and is forgotten last
+                self.mapping[token] = self.mapping.pop(token)
+            return token
 
         # Generate new token
         self.counters[pii_type] += 1
-        token = f"{TOKEN_PREFIXES[pii_type]}{chr(64 + self.counters[pii_type])}" # EMAIL_A, EMAIL_B...
-        
+        token = f"{TOKEN_PREFIXES[pii_type]}{_token_suffix(self.counters[pii_type])}" # EMAIL_A, EMAIL_B...
+
         self.mapping[token] = original_text
         self.reverse_mapping[original_text] = token
         return token
 
+    def _evict(self, keep: set):
+        """
+        Forgets the oldest tokens beyond max_tokens, but never one in `keep` (the tokens of the
+        text just masked, which must still unmask). Those are the newest, so eviction stops at the
+        first one; a single text with more than max_tokens values overshoots the cap until the next.
+        Counters keep going after an eviction, so a forgotten token is never handed out again.
+        """
+        if self.max_tokens is None:
+            return
+        while len(self.mapping) > self.max_tokens:
+            old_token = next(iter(self.mapping))
+            if old_token in keep:
+                break
+            del self.reverse_mapping[self.mapping.pop(old_token)]
+
+    def __len__(self) -> int:
+        return len(self.mapping)
+
+    @metrics.timed("masking.mask")
     def mask(self, text: str) -> Tuple[str, List[str]]:
         """
         Scans text and replaces PII with tokens.
         Returns (masked_text, logs)
+
+        Every PII class is matched by one combined regex (see pii_patterns.SCANNER),
+        and the masked text is stitched together once at the end, so the cost is
+        linear in the size of the document.
         """
-        masked_text = text
-        logs = []
-
-        for pii_type, pattern in PATTERNS.items():
-            if pii_type == "AMOUNT": continue # Don't mask amounts for finance bot
-            
-            matches = pattern.findall(masked_text)
-            for match in matches:
-                # match might be a tuple if regex has groups
-                original = match[0] if isinstance(match, tuple) else match
-                
-                # Heuristic check: Skip common false positives for names
-                if pii_type == "NAME_HEURISTIC":
-                     if original.lower() in ["bank statement", "transaction id", "credit card"]:
-                         continue
-
-                token = self._get_token(pii_type, original)
-                
-                # Replace only this instance or all? 
-                # Simple string replace can be dangerous if short strings. 
-                # Using regex sub is safer to respect word boundaries if possible, 
-                # but for this demo simple replacement of the exact match is okay ensuring we don't double mask.
-                if original in masked_text:
-                    masked_text = masked_text.replace(original, token)
-                    logs.append(f"PII Detected: '{original}' -> {token}")
-
-        return masked_text, logs
+        pieces: List[str] = []
+        detections: List[Tuple[int, str]] = [] # (class priority, log line)
+        logged = set()
+        used = set()
+        last_end = 0
+
+        for match in SCANNER.finditer(text):
+            pii_type = match.lastgroup
+            original = match.group(pii_type)
+
+            # Heuristic check: Skip common false positives for names
+            if pii_type == "NAME_HEURISTIC" and original.lower() in NAME_FALSE_POSITIVES:
+                continue
+
+            token = self._get_token(pii_type, original)
+            used.add(token)
+            pieces.append(text[last_end:match.start()])
+            pieces.append(token)
+            last_end = match.end()
+
+            # One log line per distinct value, even if it occurs many times
+            if original not in logged:
+                logged.add(original)
+                detections.append((SCAN_RANK[pii_type], f"PII Detected: '{original}' -> {token}"))
+
+        pieces.append(text[last_end:])
+        self._evict(keep=used)
+
+        # Keep the log grouped by PII class (stable sort keeps document order within a class)
+        detections.sort(key=lambda d: d[0])
+        logs = [line for _, line in detections]
+        return "".join(pieces), logs
+
+    def _restore(self, match) -> str:
+        # Unknown tokens (e.g. hallucinated by the model) are left as they are
+        token = match.group(0)
+        return self.mapping.get(token, token)
 
+    @metrics.timed("masking.unmask")
     def unmask(self, text: str) -> str:
-        """Replaces tokens back with original values."""
-        unmasked_text = text
-        for token, original in self.mapping.items():
-            unmasked_text = unmasked_text.replace(token, original)
-        return unmasked_text
-
-# Global instance for the session (in a real app, this would be per-user/session)
-engine = MaskingEngine()
+        """
+        Replaces tokens back with original values.
+        One regex pass over the text plus a dict lookup per token, so the cost does
+        not grow with the number of tokens collected in the session.
+        """
+        return TOKEN_PATTERN.sub(self._restore, text)
+
+    def stream_unmasker(self) -> "StreamUnmasker":
+        return StreamUnmasker(self)
+
+    def unmask_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Unmasks LLM output chunk by chunk (see StreamUnmasker)."""
+        unmasker = StreamUnmasker(self)
+        for chunk in chunks:
+            out = unmasker.feed(chunk)
+            if out:
+                yield out
+        tail = unmasker.flush()
+        if tail:
+            yield tail
+
+class StreamUnmasker:
+    """
+    Incremental unmasking for streamed model output.
+    A token can be split across chunks ("USER_" + "A"), so the tail of each chunk
+    that could still be the start of a token is held back until the next chunk
+    (or flush) decides it. Everything before that is unmasked and released at once.
+    """
+    def __init__(self, engine: MaskingEngine):
+        self.engine = engine
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        buffer = self._pending + chunk
+        partial = PARTIAL_TOKEN_PATTERN.search(buffer)
+        cut = partial.start() if partial else len(buffer)
+        self._pending = buffer[cut:]
+        return self.engine.unmask(buffer[:cut])
+
+    def flush(self) -> str:
+        buffer, self._pending = self._pending, ""
+        return self.engine.unmask(buffer)
+
+class MaskingStore:
+    """
+    Session-keyed MaskingEngines, so concurrent users never share tokens.
+    Sessions are kept in LRU order and dropped when idle for longer than `ttl_seconds`,
+    when there are more than `max_sessions`, or when the tokens held across all
+    sessions exceed `max_total_tokens`.
+    """
+    def __init__(self, max_sessions: int = 256, ttl_seconds: float = 3600,
+                 max_total_tokens: int = 100_000, max_tokens_per_session: int = 10_000):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_total_tokens = max_total_tokens
+        self.max_tokens_per_session = max_tokens_per_session
+        self._sessions: "OrderedDict[str, Tuple[MaskingEngine, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str = DEFAULT_SESSION) -> MaskingEngine:
+        """Returns the engine for a session, creating it if needed."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.pop(session_id, None)
+            engine = entry[0] if entry else MaskingEngine(max_tokens=self.max_tokens_per_session)
+            self._sessions[session_id] = (engine, now) # Most recently used goes last
+            self._enforce_caps(keep=session_id)
+            return engine
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "tokens": sum(len(engine) for engine, _ in self._sessions.values()),
+            }
+
+    def _expire(self, now: float):
+        # LRU order == last-access order, so expired sessions are all at the front
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+    def _enforce_caps(self, keep: str):
+        total_tokens = sum(len(engine) for engine, _ in self._sessions.values())
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or total_tokens > self.max_total_tokens
+        ):
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                break
+            engine, _ = self._sessions.pop(session_id)
+            total_tokens -= len(engine)
+
+# Global store; the desktop app uses DEFAULT_SESSION unless the client sends its own id
+store = MaskingStore()
@@ -0,0 +1,204 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+# Latency buckets in seconds: sub-millisecond masking up to slow LLM calls
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+SPAN_METRIC = "pennywise_span_seconds"
+SPAN_ERRORS = "pennywise_span_errors_total"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Span:
+    """Times a block into the span histogram; exceptions also bump the span's error counter."""
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(SPAN_METRIC, time.perf_counter() - self.start, span=self.name)
+        if exc_type is not None:
+            self.metrics.inc(SPAN_ERRORS, span=self.name)
+        return False
+
+class Metrics:
+    """
+    In-process counters and latency histograms, rendered in the Prometheus text format.
+    Recording is a dict lookup plus a bisect under one lock, so it is cheap enough for hot paths.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._help: Dict[str, str] = {
+            SPAN_METRIC: "Time spent in instrumented operations.",
+            SPAN_ERRORS: "Instrumented operations that raised.",
+            "pennywise_http_request_seconds": "Time to first response byte per route.",
+        }
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def span(self, name: str) -> Span:
+        return Span(self, name)
+
+    def timed(self, name: str):
+        """Decorator version of span for plain and async functions."""
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with Span(self, name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with Span(self, name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def summary(self) -> dict:
+        """Count / mean / p50 / p95 / p99 estimates per span, from the bucket counts."""
+        with self._lock:
+            spans = {dict(k).get("span", ""): (list(h.counts), h.sum, h.count, h.buckets)
+                     for k, h in self._histograms.get(SPAN_METRIC, {}).items()}
+        result = {}
+        for name, (counts, total, count, buckets) in sorted(spans.items()):
+            if not count:
+                continue
+            result[name] = {"count": count, "mean": total / count,
+                            **{f"p{q}": _quantile(counts, count, buckets, q / 100) for q in (50, 95, 99)}}
+        return result
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = {name: {k: (list(h.counts), h.sum, h.count, h.buckets) for k, h in series.items()}
+                          for name, series in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+
+        lines = []
+        for name in sorted(counters):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        for name in sorted(histograms):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (counts, total, count, buckets) in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+def _quantile(counts, count, buckets, q: float) -> float:
+    # Linear interpolation inside the bucket holding the q-th observation, like histogram_quantile()
+    rank = q * count
+    cumulative = 0
+    for i, bucket_count in enumerate(counts):
+        if cumulative + bucket_count >= rank and bucket_count:
+            lower = buckets[i - 1] if i > 0 else 0.0
+            upper = buckets[i] if i < len(buckets) else buckets[-1]
+            return lower + (upper - lower) * (rank - cumulative) / bucket_count
+        cumulative += bucket_count
+    return buckets[-1]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+metrics = Metrics()
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template and status.
+    Latency is measured to the start of the response, so long-lived streams (SSE) don't skew it.
+    """
+    def __init__(self, app, registry: Metrics = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status):
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            self.registry.observe("pennywise_http_request_seconds", time.perf_counter() - start,
+                                  method=scope["method"], route=path, status=str(status))
+
+        async def send_wrapper(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not recorded:
+                recorded = True
+                record(500)
+            raise
@@ -1,12 +1,140 @@
-from pypdf import PdfReader
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, List, Optional, Union
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+from .metrics import metrics
+
+# Limits for uploaded statements
+MAX_PDF_BYTES = 50 * 1024 * 1024 # 50 MB
+MAX_PDF_PAGES = 500
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Statements with at least this many pages are split across a process pool
+PARALLEL_PAGE_THRESHOLD = 40
+
+PdfSource = Union[bytes, str, BinaryIO]
+
+class PDFLimitError(ValueError):
+    """Raised when an upload exceeds MAX_PDF_BYTES or MAX_PDF_PAGES."""
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _pool_workers() -> int:
+    # The calling thread extracts one range itself, so it counts as a worker
+    return max(1, (os.cpu_count() or 2) - 1)
+
+def _get_pool() -> ProcessPoolExecutor:
+    # Started on first large statement only - spawning workers is not free.
+    # This runs on a worker thread, so the workers are spawned rather than forked.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers(),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def shutdown_pool():
+    """Stops the extraction workers, if any were started. Called from the app's lifespan."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def claim_upload(upload, max_bytes: int = MAX_PDF_BYTES, hasher=None) -> BinaryIO:
+    """
+    Takes over the SpooledTemporaryFile Starlette already received the upload into (in memory
+    when small, on disk when big), so a background job can still read it after the request
+    ends and Starlette closes the UploadFile. Checks `upload.size` against max_bytes.
+    If a hashlib object is passed as `hasher`, it is fed the file chunk by chunk.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise PDFLimitError(f"PDF is larger than {max_bytes // (1024 * 1024)} MB")
+    spool = upload.file
+    # Starlette closes whatever upload.file is at the end of the request
+    upload.file = BytesIO()
+    if hasher is not None:
+        spool.seek(0)
+        for chunk in iter(lambda: spool.read(READ_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    spool.seek(0)
+    return spool
+
+def _open_reader(source: PdfSource):
+    # pypdf is imported on first use; it is a noticeable part of backend startup otherwise
+    from pypdf import PdfReader
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    return PdfReader(source)
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    """Worker: opens the file itself and extracts pages [start, stop)."""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+def _iter_parallel(reader, source: PdfSource, page_count: int) -> Iterator[str]:
+    # Workers need a real file to open; copy the spool to disk without loading it into memory
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        if isinstance(source, bytes):
+            tmp.write(source)
+        elif isinstance(source, str):
+            tmp.close()
+            shutil.copyfile(source, tmp.name)
+        else:
+            source.seek(0)
+            shutil.copyfileobj(source, tmp)
+        path = tmp.name
+
+    # One contiguous range per process: every range costs a full parse of the file, and the
+    # first one is read here with the reader that already counted the pages
+    per_range = -(-page_count // (_pool_workers() + 1))
+    pool = _get_pool()
+    futures = [pool.submit(_extract_page_range, path, start, min(start + per_range, page_count))
+               for start in range(per_range, page_count, per_range)]
     try:
-        reader = PdfReader(BytesIO(file_bytes))
-        text = ""
+        for i in range(min(per_range, page_count)):
+            yield reader.pages[i].extract_text()
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        os.unlink(path)
+
+def iter_pdf_pages(source: PdfSource, max_pages: int = MAX_PDF_PAGES,
+                   parallel: Optional[bool] = None) -> Iterator[str]:
+    """
+    Yields the text of each page in order.
+    `parallel=None` picks the process pool automatically for long statements.
+    """
+    reader = _open_reader(source)
+    page_count = len(reader.pages)
+    if page_count > max_pages:
+        raise PDFLimitError(f"PDF has {page_count} pages, the limit is {max_pages}")
+
+    if parallel is None:
+        parallel = page_count >= PARALLEL_PAGE_THRESHOLD and (os.cpu_count() or 1) > 1
+
+    if parallel:
+        yield from _iter_parallel(reader, source, page_count)
+    else:
         for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+            yield page.extract_text()
+
+@metrics.timed("pdf.extract")
+def extract_text_from_pdf(source: PdfSource, max_pages: int = MAX_PDF_PAGES,
+                          parallel: Optional[bool] = None) -> str:
+    """Full text of the PDF, one page per line block. Accepts bytes, a path or a file object."""
+    try:
+        return "".join(f"{page_text}\n" for page_text in iter_pdf_pages(source, max_pages, parallel))
+    except PDFLimitError:
+        raise
     except Exception as e:
         return f"Error reading PDF: {str(e)}"
@@ -11,7 +11,7 @@ PATTERNS = {
     # In production, use Spacy or similar NLP
     "NAME_HEURISTIC": re.compile(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b'), 
     "ACCOUNT_NUM": re.compile(r'\b\d{9,18}\b'), # 9-18 digit account numbers
-    "SENSITIVE": re.compile(r'(?i)\b(password|secret|key|token|pin)\b'), # Demo: Keywords to easily trigger masking
+    "SENSITIVE": re.compile(r'\b(password|secret|key|token|pin)\b', re.IGNORECASE), # Demo: Keywords to easily trigger masking
     "AMOUNT": re.compile(r'(?:Rs\.?|INR|₹)\s?(\d+(?:,\d+)*(?:\.\d{2})?)') # To preserve context but maybe mask large values if needed? 
     # Usually we WANT amounts for the finance bot, so we might NOT mask amounts unless specific
 }
@@ -25,3 +25,44 @@ TOKEN_PREFIXES = {
     "ACCOUNT_NUM": "ACCT_",
     "SENSITIVE": "SECRET_"
 }
+
+# Order in which PII classes are tried when several match at the same offset.
+# AMOUNT is deliberately left out - the finance bot needs to see amounts.
+SCAN_ORDER = ["EMAIL", "PHONE", "CREDIT_CARD", "NAME_HEURISTIC", "ACCOUNT_NUM", "SENSITIVE"]
+
+def build_scanner(order=SCAN_ORDER) -> re.Pattern:
+    """
+    Combines the individual PATTERNS into one alternation with a named group per
+    PII class, so a document can be scanned for every class in a single pass.
+    `match.lastgroup` tells which class matched.
+    """
+    parts = []
+    for pii_type in order:
+        pattern = PATTERNS[pii_type]
+        body = pattern.pattern
+        # Per-pattern flags have to be scoped, a global (?i) would leak into the other classes
+        if pattern.flags & re.IGNORECASE:
+            body = f"(?i:{body})"
+        parts.append(f"(?P<{pii_type}>{body})")
+    return re.compile("|".join(parts))
+
+SCANNER = build_scanner()
+
+# Matches any token the MaskingEngine can emit (EMAIL_A, USER_AB, ...). The suffix is an
+# uppercase run, so USER_A never matches inside USER_AB.
+_PREFIX_ALTERNATION = "|".join(re.escape(p) for p in sorted(TOKEN_PREFIXES.values(), key=len, reverse=True))
+TOKEN_PATTERN = re.compile(rf'(?<![A-Za-z0-9_])(?:{_PREFIX_ALTERNATION})[A-Z]+(?![A-Za-z0-9_])')
+
+def _optional_chain(literal: str, tail: str) -> str:
+    """'AB', tail -> 'A(?:B(?:tail)?)?' - matches every non-empty prefix of literal + tail."""
+    pattern = tail
+    for ch in reversed(literal[1:]):
+        pattern = f"{re.escape(ch)}(?:{pattern})?"
+    return f"{re.escape(literal[0])}(?:{pattern})?"
+
+# Matches a token that may be cut at the end of a streamed chunk ("US", "USER_", "USER_A").
+PARTIAL_TOKEN_PATTERN = re.compile(
+    r'(?<![A-Za-z0-9_])(?:'
+    + "|".join(_optional_chain(p, "[A-Z]*") for p in TOKEN_PREFIXES.values())
+    + r')\Z'
+)
@@ -0,0 +1,239 @@
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from .market import MarketEngine
+from .services import DEFAULT_USER
+from .vault import Vault
+
+# Risk defaults: returns over the last hour of ticks, one-minute VaR horizon
+RISK_WINDOW = 3600 # seconds of history used
+VOL_WINDOW = 300 # ticks per rolling volatility window
+VAR_HORIZON = 60 # ticks
+VAR_CONFIDENCE = 0.95
+ROLLING_POINTS = 120 # points in the returned rolling volatility series
+
+class Lots(NamedTuple):
+    """A user's lots as parallel arrays, aligned with the market's symbol index."""
+    ids: np.ndarray
+    rows: np.ndarray # market symbol index per lot
+    quantity: np.ndarray
+    cost: np.ndarray # price paid per unit
+
+class PortfolioStore:
+    """
+    Holdings as lots (symbol, quantity, unit cost) in the Vault database, one set per user.
+    Each user's lots are loaded once into NumPy arrays; valuation and risk aggregate them with
+    bincount against the market's live snapshot and recorded history, so thousands of lots
+    cost the same handful of vectorized passes as one.
+    """
+    def __init__(self, vault: Vault, market: MarketEngine):
+        self.vault = vault
+        self.market = market
+        self.vault.schema('''
+            CREATE TABLE IF NOT EXISTS portfolio_lots
+                (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 user_id TEXT,
+                 symbol TEXT,
+                 quantity REAL,
+                 cost REAL,
+                 acquired TEXT);
+            CREATE INDEX IF NOT EXISTS idx_portfolio_lots_user ON portfolio_lots (user_id);
+        ''')
+        self._lots: Dict[str, Lots] = {}
+        self._lock = threading.Lock()
+        # Bumped on every holdings change; chat context caches key on it
+        self.version = 0
+
+    def lots(self, user_id: str = DEFAULT_USER) -> Lots:
+        with self._lock:
+            lots = self._lots.get(user_id)
+            # A write that lands during the read below bumps this; its result must not be cached then
+            version = self.version
+        if lots is not None:
+            return lots
+
+        with self.vault.reader() as conn:
+            rows = conn.execute("SELECT id, symbol, quantity, cost FROM portfolio_lots WHERE user_id = ? ORDER BY id",
+                                (user_id,)).fetchall()
+        # Symbols the market no longer lists can't be valued; they stay in the table but are skipped
+        rows = [r for r in rows if r[1] in self.market.index]
+        lots = Lots(
+            np.array([r[0] for r in rows], dtype=np.int64),
+            np.array([self.market.index[r[1]] for r in rows], dtype=np.intp),
+            np.array([r[2] for r in rows], dtype=np.float64),
+            np.array([r[3] for r in rows], dtype=np.float64),
+        )
+        with self._lock:
+            if self.version == version:
+                self._lots[user_id] = lots
+        return lots
+
+    def _changed(self, user_id: str):
+        with self._lock:
+            self._lots.pop(user_id, None)
+            self.version += 1
+
+    def add_lots(self, lots: List[dict], user_id: str = DEFAULT_USER) -> List[dict]:
+        """
+        Adds {symbol, quantity, cost?} lots in one transaction. A missing cost means "bought at
+        the current price". Raises ValueError for unknown symbols or non-positive quantities.
+        """
+        snapshot = self.market.snapshot()
+        acquired = datetime.now().strftime("%Y-%m-%d %H:%M")
+        values = []
+        for lot in lots:
+            symbol = str(lot.get("symbol", "")).upper()
+            row = self.market.index.get(symbol)
+            if row is None:
+                raise ValueError(f"Unknown symbol: {symbol}")
+            quantity = float(lot.get("quantity", 0))
+            if not quantity > 0:
+                raise ValueError(f"Quantity must be positive for {symbol}")
+            cost = lot.get("cost")
+            cost = float(cost) if cost is not None else float(snapshot.columns["price"][row])
+            values.append((user_id, symbol, quantity, cost, acquired))
+
+        def write(conn: sqlite3.Connection):
+            ids = []
+            for value in values:
+                cur = conn.execute(
+                    "INSERT INTO portfolio_lots (user_id, symbol, quantity, cost, acquired) VALUES (?, ?, ?, ?, ?)", value)
+                ids.append(cur.lastrowid)
+            return ids
+
+        ids = self.vault.transact(write)
+        self._changed(user_id)
+        return [{"id": i, "symbol": v[1], "quantity": v[2], "cost": v[3], "acquired": v[4]} for i, v in zip(ids, values)]
+
+    def remove_lot(self, lot_id: int, user_id: str = DEFAULT_USER) -> bool:
+        removed = self.vault.execute("DELETE FROM portfolio_lots WHERE id = ? AND user_id = ?", (lot_id, user_id))
+        if removed:
+            self._changed(user_id)
+        return bool(removed)
+
+    def clear(self, user_id: str = DEFAULT_USER) -> int:
+        removed = self.vault.execute("DELETE FROM portfolio_lots WHERE user_id = ?", (user_id,))
+        self._changed(user_id)
+        return removed
+
+    def list_lots(self, user_id: str = DEFAULT_USER, symbol: Optional[str] = None) -> List[dict]:
+        query = "SELECT id, symbol, quantity, cost, acquired FROM portfolio_lots WHERE user_id = ?"
+        params = [user_id]
+        if symbol:
+            query += " AND symbol = ?"
+            params.append(symbol.upper())
+        with self.vault.reader() as conn:
+            rows = conn.execute(query + " ORDER BY id", params).fetchall()
+        return [{"id": r[0], "symbol": r[1], "quantity": r[2], "cost": r[3], "acquired": r[4]} for r in rows]
+
+    def _positions(self, lots: Lots):
+        """Per-symbol quantity and cost basis (arrays over the whole market index)."""
+        n = len(self.market.symbols)
+        quantity = np.bincount(lots.rows, weights=lots.quantity, minlength=n)
+        basis = np.bincount(lots.rows, weights=lots.quantity * lots.cost, minlength=n)
+        return quantity, basis
+
+    def valuation(self, user_id: str = DEFAULT_USER) -> dict:
+        """Positions per symbol with value, P&L, day change and weight, plus portfolio totals."""
+        lots = self.lots(user_id)
+        snapshot = self.market.snapshot()
+        price, change = snapshot.columns["price"], snapshot.columns["change"]
+
+        quantity, basis = self._positions(lots)
+        value = quantity * price
+        pnl = value - basis
+        day_change = quantity * change
+        total_value, total_basis = float(value.sum()), float(basis.sum())
+        weights = value / total_value if total_value else np.zeros_like(value)
+
+        held = np.flatnonzero(quantity > 0)
+        # Largest positions first
+        held = held[np.argsort(-value[held], kind="stable")]
+        positions = [
+            {"symbol": self.market.symbols[i], "quantity": q, "avg_cost": round(b / q, 2), "price": p,
+             "value": round(v, 2), "cost_basis": round(b, 2), "pnl": round(g, 2),
+             "pnl_pct": round(g / b * 100, 2) if b else 0.0, "day_change": round(d, 2), "weight": round(w, 4)}
+            for i, q, b, p, v, g, d, w in zip(held.tolist(), quantity[held].tolist(), basis[held].tolist(),
+                                              price[held].tolist(), value[held].tolist(), pnl[held].tolist(),
+                                              day_change[held].tolist(), weights[held].tolist())
+        ]
+        total_pnl = total_value - total_basis
+        return {
+            "user_id": user_id,
+            "as_of": snapshot.timestamp,
+            "lots": int(len(lots.ids)),
+            "positions": positions,
+            "totals": {
+                "value": round(total_value, 2),
+                "cost_basis": round(total_basis, 2),
+                "pnl": round(total_pnl, 2),
+                "pnl_pct": round(total_pnl / total_basis * 100, 2) if total_basis else 0.0,
+                "day_change": round(float(day_change.sum()), 2),
+            },
+        }
+
+    def risk(self, user_id: str = DEFAULT_USER, window: float = RISK_WINDOW, vol_window: int = VOL_WINDOW,
+             horizon: int = VAR_HORIZON, confidence: float = VAR_CONFIDENCE) -> dict:
+        """
+        Risk over the recorded tick history (the last `window` seconds), holding today's quantities fixed:
+        - per-symbol and portfolio volatility of per-tick log returns, the latter also as a rolling series
+        - historical VaR / expected shortfall: losses of the portfolio value over `horizon`-tick moves
+        """
+        lots = self.lots(user_id)
+        quantity, _ = self._positions(lots)
+        held = np.flatnonzero(quantity > 0)
+        times, prices = self.market.history.matrix(since=self.market.snapshot().timestamp - window)
+        result = {"user_id": user_id, "ticks": int(len(times)), "horizon": horizon, "confidence": confidence,
+                  "volatility": None, "rolling_volatility": [], "var": None, "expected_shortfall": None, "by_symbol": []}
+        if len(held) == 0 or len(times) < 3:
+            return result
+
+        prices = prices[held]
+        log_returns = np.diff(np.log(prices), axis=1)
+        symbol_vol = log_returns[:, -vol_window:].std(axis=1)
+
+        # Portfolio value path with current quantities, and its per-tick log returns
+        values = quantity[held] @ prices
+        port_returns = np.diff(np.log(values))
+        result["volatility"] = round(float(port_returns[-vol_window:].std()), 6)
+
+        # Rolling std from cumulative sums - O(ticks) regardless of the window length
+        w = min(vol_window, len(port_returns))
+        sums = np.concatenate(([0.0], np.cumsum(port_returns)))
+        sq_sums = np.concatenate(([0.0], np.cumsum(port_returns ** 2)))
+        mean = (sums[w:] - sums[:-w]) / w
+        rolling = np.sqrt(np.maximum((sq_sums[w:] - sq_sums[:-w]) / w - mean ** 2, 0.0))
+        step = max(1, len(rolling) // ROLLING_POINTS)
+        rolling_times = times[w:][::step]
+        result["rolling_volatility"] = [{"t": t, "volatility": round(v, 6)}
+                                        for t, v in zip(rolling_times.tolist(), rolling[::step].tolist())]
+
+        # Historical VaR: the (1 - confidence) quantile of overlapping horizon P&L, reported as a positive loss
+        h = min(horizon, len(values) - 1)
+        pnl = values[h:] - values[:-h]
+        var = -np.quantile(pnl, 1 - confidence)
+        tail = pnl[pnl <= -var]
+        result["horizon"] = h
+        result["var"] = round(float(max(var, 0.0)), 2)
+        result["expected_shortfall"] = round(float(-tail.mean()), 2) if len(tail) else result["var"]
+        result["by_symbol"] = [{"symbol": self.market.symbols[i], "volatility": round(v, 6)}
+                               for i, v in zip(held.tolist(), symbol_vol.tolist())]
+        return result
+
+    def get_context(self, user_id: str = DEFAULT_USER) -> str:
+        """Short portfolio summary for the chat prompt."""
+        valuation = self.valuation(user_id)
+        if not valuation["positions"]:
+            return "PORTFOLIO: No holdings recorded yet."
+        totals = valuation["totals"]
+        top = ", ".join(f"{p['symbol']} {p['weight'] * 100:.0f}%" for p in valuation["positions"][:5])
+        return (
+            f"PORTFOLIO:\n"
+            f"- Market Value: Rs {totals['value']:.0f} (Invested Rs {totals['cost_basis']:.0f}, "
+            f"P&L Rs {totals['pnl']:.0f} / {totals['pnl_pct']}%)\n"
+            f"- Top Holdings: {top}"
+        )
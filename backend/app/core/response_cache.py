@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .metrics import metrics
+from .vault import Vault
+
+def make_key(masked_prompt: str, system_prompt: Optional[str], model_name: Optional[str]) -> str:
+    """Fingerprint of everything that determines the reply. Only masked text is hashed, never raw PII."""
+    h = hashlib.sha256()
+    for part in (model_name or "", system_prompt or "", masked_prompt):
+        h.update(part.encode())
+        h.update(b"\x00") # Separator so ("ab", "c") != ("a", "bc")
+    return h.hexdigest()
+
+def _is_error(text: str) -> bool:
+    # GeminiClient reports failures as text; those must never be cached
+    return text.startswith(("AI Error", "Error:"))
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM replies: an in-memory LRU in front of an encrypted
+    `llm_cache` table in the Vault database, so answers survive a restart.
+    Entries expire after `ttl_seconds`.
+    """
+    def __init__(self, vault: Vault, max_memory_entries: int = 512, ttl_seconds: float = 6 * 3600):
+        self.vault = vault
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict() # key -> (created_at, response)
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "miss_seconds": 0.0}
+        self._init_db()
+
+    def _init_db(self):
+        self.vault.schema('''CREATE TABLE IF NOT EXISTS llm_cache
+                     (key TEXT PRIMARY KEY,
+                      created_at REAL,
+                      model TEXT,
+                      encrypted_response TEXT)''')
+
+    def _remember(self, key: str, created_at: float, response: str):
+        with self._lock:
+            self._memory[key] = (created_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _count(self, name: str, value: float = 1):
+        with self._lock:
+            self.stats[name] += value
+
+    def _get_memory(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                metrics.inc("pennywise_llm_cache_total", result="memory_hit")
+                return entry[1]
+            if entry:
+                del self._memory[key]
+        return None
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        response = self._get_memory(key, now)
+        if response is not None:
+            return response
+        return self._get_disk(key, now)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """get() for the event loop: the memory tier inline, the Vault lookup and decrypt on a thread."""
+        now = time.time()
+        response = self._get_memory(key, now)
+        if response is not None:
+            return response
+        return await asyncio.to_thread(self._get_disk, key, now)
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        with self.vault.reader() as conn:
+            row = conn.execute("SELECT created_at, encrypted_response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row and now - row[0] > self.ttl_seconds:
+            self.vault.submit("DELETE FROM llm_cache WHERE key = ?", (key,))
+            row = None
+
+        if row:
+            try:
+                response = self.vault.cipher.decrypt(row[1].encode()).decode()
+            except Exception:
+                response = None # Key rotated or row corrupted - treat as a miss
+            if response is not None:
+                self._remember(key, row[0], response)
+                self._count("disk_hits")
+                metrics.inc("pennywise_llm_cache_total", result="disk_hit")
+                return response
+
+        self._count("misses")
+        metrics.inc("pennywise_llm_cache_total", result="miss")
+        return None
+
+    def put(self, key: str, model_name: str, response: str):
+        if _is_error(response):
+            return
+        created_at = time.time()
+        self._remember(key, created_at, response)
+
+        encrypted = self.vault.cipher.encrypt(response.encode()).decode()
+        # Fire and forget - the memory tier already serves this key until the batch commits
+        self.vault.submit("INSERT OR REPLACE INTO llm_cache (key, created_at, model, encrypted_response) VALUES (?, ?, ?, ?)",
+                          (key, created_at, model_name, encrypted))
+        self._count("stores")
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """Drops one entry, or everything when no key is given. Returns the number of rows removed."""
+        with self._lock:
+            if key is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(key, None)
+
+        if key is None:
+            return self.vault.execute("DELETE FROM llm_cache")
+        return self.vault.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            for key in [k for k, (created_at, _) in self._memory.items() if created_at < cutoff]:
+                del self._memory[key]
+
+        return self.vault.execute("DELETE FROM llm_cache WHERE created_at < ?", (cutoff,))
+
+    async def generate(self, client, prompt: str, system_instruction: str = None) -> str:
+        """Cache-aware replacement for client.generate_response."""
+        key = make_key(prompt, system_instruction, client.model_name)
+        cached = await self.get_async(key)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        response = await client.generate_response(prompt, system_instruction=system_instruction)
+        self._count("miss_seconds", time.perf_counter() - start)
+        self.put(key, client.model_name, response)
+        return response
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            memory_entries = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        avg_miss = stats["miss_seconds"] / stats["misses"] if stats["misses"] else 0.0
+        stats.update({
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "avg_miss_seconds": round(avg_miss, 4),
+            # Every hit is one Gemini call (quota) and roughly one average round trip saved
+            "api_calls_saved": hits,
+            "est_seconds_saved": round(hits * avg_miss, 3),
+        })
+        return stats
@@ -0,0 +1,169 @@
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+# Day buckets cover this range; one Fenwick tree slot per day
+EPOCH = date(2000, 1, 1)
+HORIZON_DAYS = (date(2100, 1, 1) - EPOCH).days
+
+class Fenwick:
+    """Binary indexed tree: point add and prefix sum in O(log n)."""
+    def __init__(self, size: int):
+        self.size = size
+        self.tree = [0.0] * (size + 1)
+
+    def add(self, index: int, value: float):
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += value
+            i += i & -i
+
+    def prefix(self, index: int) -> float:
+        """Sum of slots [0, index]."""
+        total = 0.0
+        i = min(index, self.size - 1) + 1
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def range(self, lo: int, hi: int) -> float:
+        if hi < lo:
+            return 0.0
+        return self.prefix(hi) - (self.prefix(lo - 1) if lo > 0 else 0.0)
+
+def _day_index(day: date) -> int:
+    return min(max((day - EPOCH).days, 0), HORIZON_DAYS - 1)
+
+def parse_day(value: str) -> date:
+    """Ledger dates are 'YYYY-MM-DD HH:MM'; only the day matters here."""
+    return date.fromisoformat(value[:10])
+
+class LedgerRollup:
+    """
+    Incremental aggregates over the ledger. Each appended transaction updates per-day
+    Fenwick trees (money in, money out, count, and money out per category) plus a monthly
+    table, so any date-range total is two prefix sums: O(log n), whatever the ledger size.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._in = Fenwick(HORIZON_DAYS)
+            self._out = Fenwick(HORIZON_DAYS)
+            self._count = Fenwick(HORIZON_DAYS)
+            self._category_out: Dict[str, Fenwick] = {}
+            self.monthly: Dict[str, Dict[str, float]] = defaultdict(lambda: {"in": 0.0, "out": 0.0, "count": 0})
+            self.first_day: Optional[date] = None
+            self.last_day: Optional[date] = None
+
+    def add(self, day: date, amount: float, type: str, category: str = "Other"):
+        idx = _day_index(day)
+        with self._lock:
+            if type == "IN":
+                self._in.add(idx, amount)
+            elif type == "OUT":
+                self._out.add(idx, amount)
+                tree = self._category_out.get(category)
+                if tree is None:
+                    tree = self._category_out[category] = Fenwick(HORIZON_DAYS)
+                tree.add(idx, amount)
+            self._count.add(idx, 1)
+
+            month = self.monthly[day.strftime("%Y-%m")]
+            if type == "IN":
+                month["in"] += amount
+            elif type == "OUT":
+                month["out"] += amount
+            month["count"] += 1
+
+            if self.first_day is None or day < self.first_day:
+                self.first_day = day
+            if self.last_day is None or day > self.last_day:
+                self.last_day = day
+
+    def add_many(self, entries):
+        """
+        Bulk version of add for (day, amount, type, category) tuples. Entries are summed per
+        (day, type, category) first, so the trees see one update per bucket instead of per row.
+        """
+        buckets: Dict[tuple, list] = defaultdict(lambda: [0.0, 0])
+        for day, amount, type, category in entries:
+            bucket = buckets[(day, type, category)]
+            bucket[0] += amount
+            bucket[1] += 1
+
+        with self._lock:
+            for (day, type, category), (amount, count) in buckets.items():
+                idx = _day_index(day)
+                if type == "IN":
+                    self._in.add(idx, amount)
+                elif type == "OUT":
+                    self._out.add(idx, amount)
+                    tree = self._category_out.get(category)
+                    if tree is None:
+                        tree = self._category_out[category] = Fenwick(HORIZON_DAYS)
+                    tree.add(idx, amount)
+                self._count.add(idx, count)
+
+                month = self.monthly[day.strftime("%Y-%m")]
+                if type == "IN":
+                    month["in"] += amount
+                elif type == "OUT":
+                    month["out"] += amount
+                month["count"] += count
+
+                if self.first_day is None or day < self.first_day:
+                    self.first_day = day
+                if self.last_day is None or day > self.last_day:
+                    self.last_day = day
+
+    def totals(self, start: date, end: date) -> dict:
+        """Totals for the inclusive day range [start, end]."""
+        lo, hi = _day_index(start), _day_index(end)
+        with self._lock:
+            money_in = self._in.range(lo, hi)
+            money_out = self._out.range(lo, hi)
+            count = int(self._count.range(lo, hi))
+            by_category = {name: round(tree.range(lo, hi), 2) for name, tree in self._category_out.items()}
+
+        days = max((end - start).days + 1, 1)
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "days": days,
+            "count": count,
+            "in": round(money_in, 2),
+            "out": round(money_out, 2),
+            "net": round(money_in - money_out, 2),
+            "avg_daily_out": round(money_out / days, 2),
+            "avg_transaction": round((money_in + money_out) / count, 2) if count else 0.0,
+            "by_category": {k: v for k, v in sorted(by_category.items(), key=lambda kv: -kv[1]) if v},
+        }
+
+    def burn_rate(self, days: int = 30, today: Optional[date] = None) -> dict:
+        """Average daily outflow over the trailing `days` window."""
+        today = today or date.today()
+        window = self.totals(today - timedelta(days=days - 1), today)
+        return {"days": days, "daily_burn": window["avg_daily_out"], "monthly_burn": round(window["avg_daily_out"] * 30, 2)}
+
+    def avg_monthly_spend(self, months: int = 3, today: Optional[date] = None) -> Optional[float]:
+        """Mean outflow per 30 days over the trailing window, or None when the ledger has no spending yet."""
+        if self.last_day is None:
+            return None
+        today = today or date.today()
+        start = max(today - timedelta(days=30 * months - 1), self.first_day)
+        window = self.totals(start, today)
+        if not window["out"]:
+            return None
+        # A ledger younger than a month is not extrapolated - it counts as one (partial) month
+        return round(window["out"] / max(window["days"], 30) * 30, 2)
+
+    def monthly_series(self, months: int = 12) -> list:
+        with self._lock:
+            keys = sorted(self.monthly)[-months:]
+            return [{"month": k, "in": round(self.monthly[k]["in"], 2), "out": round(self.monthly[k]["out"], 2),
+                     "count": self.monthly[k]["count"]} for k in keys]
@@ -0,0 +1,136 @@
+"""
+The app's long-lived subsystems (Vault, ledger/finance, market, Gemini, response cache), built on first use.
+
+Nothing heavy happens at import: each provider imports its module and builds the object the
+first time it is asked for, once, under a lock. FastAPI routes take them as dependencies
+(`Depends(get_vault)`), and the app's lifespan warms them up on a background thread, so
+the server answers `/` straight away while NumPy, pandas and the Gemini SDK load behind it.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+from .metrics import metrics, SPAN_METRIC
+
+T = TypeVar("T")
+
+# The desktop app has one user; portfolio routes default to it. Lives here rather than in
+# core.portfolio so the routes can use it without importing NumPy at startup.
+DEFAULT_USER = "default"
+
+# Seconds spent building each subsystem, in the order they were built (for the startup profile)
+init_times: Dict[str, float] = {}
+
+_env_loaded = False
+
+def load_env():
+    """Reads .env once, before the first subsystem that needs its settings is built."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+class Lazy(Generic[T]):
+    """A value built by `factory` on the first get(); later calls return the same object."""
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    def peek(self) -> Optional[T]:
+        """The value if it has been built, without building it (e.g. for shutdown)."""
+        return self._value
+
+    def get(self) -> T:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    load_env()
+                    start = time.perf_counter()
+                    value = self.factory()
+                    elapsed = time.perf_counter() - start
+                    init_times[self.name] = elapsed
+                    metrics.observe(SPAN_METRIC, elapsed, span=f"init.{self.name}")
+                    print(f"DEBUG: Initialized {self.name} in {elapsed * 1000:.0f} ms")
+                    self._value = value
+        return self._value
+
+def _build_vault():
+    from .vault import Vault
+    return Vault()
+
+def _build_market():
+    from .market import MarketEngine
+    engine = MarketEngine()
+    engine.start()
+    return engine
+
+def _build_finance():
+    from .finance import FinanceEngine
+    # Builds its ledger and portfolio on get_vault() / get_market_engine()
+    return FinanceEngine()
+
+def _build_gemini():
+    from .gemini_client import GeminiClient
+    return GeminiClient()
+
+def _build_response_cache():
+    from .response_cache import ResponseCache
+    return ResponseCache(get_vault())
+
+vault = Lazy("vault", _build_vault)
+market_engine = Lazy("market", _build_market)
+finance_engine = Lazy("finance", _build_finance)
+gemini_client = Lazy("gemini", _build_gemini)
+response_cache = Lazy("response_cache", _build_response_cache)
+
+# Warm-up order: dependencies first, the slowest imports (pandas, Gemini SDK) last
+ALL = (vault, response_cache, market_engine, finance_engine, gemini_client)
+
+def get_vault():
+    return vault.get()
+
+def get_market_engine():
+    return market_engine.get()
+
+def get_finance_engine():
+    return finance_engine.get()
+
+def get_gemini_client():
+    return gemini_client.get()
+
+def get_response_cache():
+    return response_cache.get()
+
+def warm_up():
+    """Builds every subsystem. Failures are logged and left for the first request to surface."""
+    for service in ALL:
+        try:
+            service.get()
+        except Exception as e:
+            print(f"ERROR: Warm-up of {service.name} failed: {e}")
+
+def start_warm_up() -> Optional[threading.Thread]:
+    """Runs warm_up on a daemon thread, unless PENNYWISE_WARMUP=0 (then everything stays lazy)."""
+    if os.getenv("PENNYWISE_WARMUP", "1") == "0":
+        return None
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def shutdown():
+    """Stops and flushes only what was actually started."""
+    market = market_engine.peek()
+    if market is not None:
+        market.stop()
+    store = vault.peek()
+    if store is not None:
+        # Commit any events still sitting in the Vault's write queue
+        store.close()
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+STATEMENT_PROMPT = (
+    "You are a financial analyst. Analyze this bank statement text. "
+    "1. Provide a textual summary of spending habits and advice.\n"
+    "2. EXTREMELY IMPORTANT: You must ALSO output a valid JSON block at the very end of your response inside [[JSON: ... ]] markers.\n"
+    "The JSON must have this structure: \n"
+    "{ \"breakdown\": [{\"name\": \"Food\", \"value\": 100}, ...], \"safe_to_spend\": 5000, \"total_expenses\": 10000, \"current_balance\": 50000 }\n"
+    "Base the values only on the text provided.\n"
+    "CRITICAL: 'current_balance' must be the last balance shown in the statement, or null if it shows none - never guess it. "
+    "For 'safe_to_spend', use null if there is no balance to base it on. Do not return negative values."
+)
+
+# Used when the chart numbers were already computed locally - the model only writes the summary
+NARRATIVE_PROMPT = (
+    "You are a financial analyst. Analyze this bank statement text. "
+    "Provide a textual summary of spending habits and advice. Do not output JSON."
+)
+
+# Added when a statement is split, so the model only reports what is in its own part
+CHUNK_NOTE = "\nThis is part {index} of {total} of a longer statement. Only count the transactions in this part."
+CHART_CHUNK_NOTE = " For 'current_balance' report the last balance shown in this part, or null if there is none."
+
+JSON_BLOCK = re.compile(r'\[\[JSON:\s*(\{.*?\})\s*\]\]', re.DOTALL)
+
+# Roughly 3k tokens of statement per call - well inside the context window, big enough to batch rows
+MAX_CHUNK_CHARS = 12000
+
+def split_statement(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Splits a statement on line boundaries so that no transaction row is cut in half.
+    Only a single line longer than max_chars gets split mid-line.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                chunks.append("".join(current))
+                current, size = [], 0
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        if size + len(line) > max_chars and current:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line)
+    if current:
+        chunks.append("".join(current))
+    return [c for c in chunks if c.strip()]
+
+def parse_analysis(analysis: str) -> Tuple[str, Optional[dict]]:
+    """Splits a model reply into (narrative, chart_data). chart_data is None when the JSON block is missing or broken."""
+    json_match = JSON_BLOCK.search(analysis)
+    if not json_match:
+        return analysis, None
+    try:
+        chart_data = json.loads(json_match.group(1))
+    except Exception as parse_error:
+        print(f"Error parsing JSON: {parse_error}")
+        return analysis, None
+    # Remove the JSON block from the textual analysis
+    return analysis.replace(json_match.group(0), "").strip(), chart_data
+
+def _as_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def merge_chart_data(parts: List[Optional[dict]]) -> Optional[dict]:
+    """
+    Reduces per-chunk chart data into one result:
+    categories and total_expenses are summed, while current_balance and safe_to_spend come
+    from the last chunk that reports them (statements run oldest to newest).
+    Values are coerced to numbers on the way, so a single part is cleaned up the same way;
+    anything non-numeric the model returned is dropped.
+    """
+    parts = [p for p in parts if isinstance(p, dict)]
+    if not parts:
+        return None
+
+    categories: Dict[str, float] = {}
+    total_expenses = 0.0
+    current_balance = None
+    safe_to_spend = None
+    for part in parts:
+        for item in part.get("breakdown") or []:
+            value = _as_float(item.get("value"))
+            if value is None or not item.get("name"):
+                continue
+            # Same category from different chunks may differ in case ("Food" / "food")
+            name = str(item["name"]).strip().title()
+            categories[name] = categories.get(name, 0.0) + value
+        total_expenses += _as_float(part.get("total_expenses")) or 0.0
+        balance = _as_float(part.get("current_balance"))
+        if balance is not None:
+            current_balance = balance
+        safe = _as_float(part.get("safe_to_spend"))
+        if safe is not None:
+            safe_to_spend = safe
+
+    merged = {
+        "breakdown": [{"name": name, "value": round(value, 2)}
+                      for name, value in sorted(categories.items(), key=lambda kv: -kv[1])],
+        "total_expenses": round(total_expenses, 2),
+    }
+    if current_balance is not None:
+        merged["current_balance"] = current_balance
+    if safe_to_spend is not None:
+        merged["safe_to_spend"] = max(0.0, safe_to_spend)
+    return merged
+
+async def analyze_statement(masked_text: str,
+                            generate: Callable[[str, str], Awaitable[str]],
+                            max_chunk_chars: int = MAX_CHUNK_CHARS,
+                            prompt: str = STATEMENT_PROMPT) -> Tuple[str, Optional[dict]]:
+    """
+    Map-reduce analysis: every chunk is sent to the model concurrently (the Gemini client's
+    semaphore bounds how many are in flight), then narratives and chart data are merged.
+    `generate(prompt, system_instruction)` returns the raw model reply.
+    """
+    chunks = split_statement(masked_text, max_chunk_chars) or [masked_text]
+    if len(chunks) == 1:
+        narrative, chart_data = parse_analysis(await generate(chunks[0], prompt))
+        return narrative, merge_chart_data([chart_data])
+
+    total = len(chunks)
+    wants_chart = prompt == STATEMENT_PROMPT
+    note = CHUNK_NOTE + (CHART_CHUNK_NOTE if wants_chart else "")
+    # One failed chunk shouldn't sink the rest; it is reported instead
+    replies = await asyncio.gather(*[
+        generate(chunk, prompt + note.format(index=i, total=total))
+        for i, chunk in enumerate(chunks, start=1)
+    ], return_exceptions=True)
+
+    narratives = []
+    chart_parts = []
+    failed = []
+    for i, reply in enumerate(replies, start=1):
+        if isinstance(reply, Exception):
+            reply = f"AI Error: {reply}"
+        narrative, chart_data = parse_analysis(reply)
+        if reply.startswith(("AI Error", "Error:")) or (wants_chart and chart_data is None):
+            failed.append(i)
+            narrative = f"(This part could not be analyzed.) {narrative}"
+        narratives.append(f"**Part {i}/{total}:** {narrative}")
+        chart_parts.append(chart_data)
+
+    merged = merge_chart_data(chart_parts)
+    if merged is not None and failed:
+        # The totals only cover the parts that came back
+        merged["failed_parts"] = failed
+        merged["total_parts"] = total
+    return "\n\n".join(narratives), merged
@@ -0,0 +1,86 @@
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Six hours of one-second ticks per symbol (~170 KB each)
+HISTORY_CAPACITY = 6 * 60 * 60
+
+class TickHistory:
+    """
+    Fixed-size ring buffer of prices for every symbol, indexed by the engine's symbol index.
+    All symbols tick together, so there is one shared timestamp ring and one
+    (symbols x capacity) price matrix. Rows are contiguous, so reading one symbol's series is a slice copy.
+    Memory is bounded at capacity * (symbols + 1) floats no matter how long the app runs.
+    """
+    def __init__(self, n_symbols: int, capacity: int = HISTORY_CAPACITY):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.prices = np.zeros((n_symbols, capacity), dtype=np.float64)
+        self.size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def record(self, timestamp: float, prices: np.ndarray):
+        """Stores one tick (a price per symbol). O(symbols), no allocation."""
+        with self._lock:
+            pos = self._next
+            self.times[pos] = timestamp
+            self.prices[:, pos] = prices
+            self._next = (pos + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+
+    def series(self, row: int, since: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Chronological (times, prices) for one symbol, optionally only ticks at or after `since`."""
+        return self._ordered(row, since)
+
+    def matrix(self, since: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Chronological (times, prices) for every symbol at once: prices is (symbols x ticks)."""
+        return self._ordered(slice(None), since)
+
+    def _ordered(self, rows, since: Optional[float]) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            start = (self._next - self.size) % self.capacity
+            if start + self.size <= self.capacity:
+                times = self.times[start:start + self.size].copy()
+                prices = self.prices[rows, start:start + self.size].copy()
+            else:
+                # Wrapped: oldest part is at the end of the buffer
+                times = np.concatenate((self.times[start:], self.times[:self._next]))
+                prices = np.concatenate((self.prices[rows, start:], self.prices[rows, :self._next]), axis=-1)
+
+        if since is not None:
+            cut = np.searchsorted(times, since, side="left")
+            times, prices = times[cut:], prices[..., cut:]
+        return times, prices
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets downsampling to `threshold` points.
+    Keeps the first and last points and, per bucket, the point forming the largest triangle
+    with the previous pick and the next bucket's average - so peaks and dips survive.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # Bucket edges over the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    keep = np.empty(threshold, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # Twice the triangle area for every candidate in the bucket at once
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return x[keep], y[keep]
@@ -0,0 +1,139 @@
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .pii_patterns import PATTERNS
+
+# A transaction row starts with a date: 05/01/2024, 05-01-24, 2024-01-05, 05 Jan 2024
+DATE_PREFIX = re.compile(
+    r'^\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2}|\d{1,2}\s+[A-Za-z]{3}\s+\d{2,4})\s+(.*)$'
+)
+CURRENCY_AMOUNT = PATTERNS["AMOUNT"] # Rs 1,200.00 / INR 500 / ₹99
+# Bank exports often print bare amounts; only accept those with paise so dates/ids don't match
+BARE_AMOUNT = re.compile(r'(?<![\d.,])(\d{1,3}(?:,\d{2,3})*\.\d{2}|\d+\.\d{2})(?![\d])')
+CREDIT_MARKER = re.compile(r'\b(?:cr|credit(?:ed)?|salary|refund|deposit|cashback|interest|neft in|received)\b', re.IGNORECASE)
+
+# Category -> description regex (matched against lowercased text with digits stripped).
+# First match wins, in this order.
+CATEGORY_RULES = {
+    "Rent": r'\brent|landlord|housing',
+    "Bills": r'electric|bescom|wifi|broadband|airtel|jio|vodafone|\bvi\b|water bill|gas bill|recharge|dth',
+    "Subscriptions": r'netflix|spotify|prime|hotstar|adobe|youtube|icloud|gym|membership|subscription',
+    "Food": r'swiggy|zomato|restaurant|cafe|food|dominos|mcdonald|kfc|starbucks|eats',
+    "Groceries": r'bigbasket|blinkit|zepto|grofers|dmart|grocery|supermarket|mart\b',
+    "Transport": r'uber|\bola\b|rapido|metro|irctc|fuel|petrol|diesel|indigo|air india|parking|fastag',
+    "Shopping": r'amazon|flipkart|myntra|ajio|nykaa|meesho|store|shopping',
+    "Health": r'pharma|apollo|medical|hospital|clinic|netmeds|health',
+    "Education": r'fees|tuition|college|university|udemy|coursera|school',
+    "Transfers": r'upi|imps|neft|rtgs|transfer',
+}
+_COMPILED_RULES = {name: re.compile(rx) for name, rx in CATEGORY_RULES.items()}
+_DIGITS = re.compile(r'\d+')
+
+def _parse_dates(raw: pd.Series) -> pd.Series:
+    # ISO dates are year-first; everything else on Indian statements is day-first
+    iso = raw.str.match(r'\d{4}-')
+    dates = pd.to_datetime(raw.where(~iso), dayfirst=True, errors="coerce", format="mixed")
+    if iso.any():
+        dates[iso] = pd.to_datetime(raw[iso], errors="coerce", format="%Y-%m-%d")
+    return dates
+
+def _to_numbers(raw: pd.Series) -> pd.Series:
+    return pd.to_numeric(raw.str.replace(",", "", regex=False), errors="coerce")
+
+def extract_transactions(text: str) -> pd.DataFrame:
+    """
+    Pulls (date, description, amount, balance, type, category) rows out of statement text.
+    A row is a line starting with a date and holding at least one amount; when a line
+    has two or more amounts the last one is taken as the running balance.
+    """
+    dates, descriptions, amounts, balances, credits = [], [], [], [], []
+    for line in text.splitlines():
+        match = DATE_PREFIX.match(line)
+        if not match:
+            continue
+        date_str, rest = match.groups()
+        found = list(CURRENCY_AMOUNT.finditer(rest)) or list(BARE_AMOUNT.finditer(rest))
+        if not found:
+            continue
+        dates.append(date_str)
+        descriptions.append(rest[:found[0].start()].strip(" -|:") or rest.strip())
+        amounts.append(found[0].group(1))
+        balances.append(found[-1].group(1) if len(found) >= 2 else None)
+        credits.append(CREDIT_MARKER.search(rest) is not None)
+
+    if not dates:
+        return pd.DataFrame(columns=["date", "description", "amount", "balance", "type", "category"])
+
+    # Column-wise conversion: one vectorized call per column instead of per row
+    df = pd.DataFrame({
+        "date": _parse_dates(pd.Series(dates, dtype=object)),
+        "description": descriptions,
+        "amount": _to_numbers(pd.Series(amounts, dtype=object)),
+        "balance": _to_numbers(pd.Series(balances, dtype=object)),
+        "type": np.where(credits, "IN", "OUT"),
+    })
+    df["category"] = np.where(df["type"] == "IN", "Income", categorize(df["description"]))
+    return df
+
+def _category_key(description: str) -> str:
+    # Reference numbers blanked out, so "SWIGGY ORDER 1234" and "Swiggy Order 98" share a key
+    return _DIGITS.sub(" ", description.lower())
+
+def categorize(descriptions: pd.Series) -> pd.Series:
+    """
+    Vectorized rule matching. Descriptions repeat heavily once reference numbers are
+    stripped ("SWIGGY ORDER 1234"), so the rules run over the distinct keys only and the
+    labels are broadcast back to every row with one take.
+    """
+    keys = descriptions.fillna("").map(_category_key)
+    codes, uniques = pd.factorize(keys)
+    uniques = pd.Series(uniques, dtype=object)
+    conditions = [uniques.str.contains(rule).to_numpy(dtype=bool) for rule in _COMPILED_RULES.values()]
+    labels = np.select(conditions, list(_COMPILED_RULES.keys()), default="Other")
+    return pd.Series(labels[codes], index=descriptions.index)
+
+def categorize_one(description: str) -> str:
+    """Single-row version of categorize, for ledger entries added one at a time."""
+    key = _category_key(description)
+    for name, rule in _COMPILED_RULES.items():
+        if rule.search(key):
+            return name
+    return "Other"
+
+def build_chart_data(df: pd.DataFrame, opening_balance: Optional[float] = None) -> Optional[dict]:
+    """
+    Chart payload in the same shape the LLM used to produce:
+    breakdown, total_expenses and current_balance (safe_to_spend is added by the caller).
+    current_balance is the last balance printed on the statement, or worked out from a known
+    `opening_balance`; otherwise None - it is synced into the ledger, so it is never guessed.
+    Returns None when no transactions were found.
+    """
+    if df.empty:
+        return None
+
+    outgoing = df[df["type"] == "OUT"]
+    by_category = outgoing.groupby("category")["amount"].sum().sort_values(ascending=False)
+    total_expenses = float(outgoing["amount"].sum())
+    total_income = float(df.loc[df["type"] == "IN", "amount"].sum())
+
+    balances = df["balance"].dropna()
+    if not balances.empty:
+        current_balance = float(balances.iloc[-1])
+    elif opening_balance is not None:
+        current_balance = opening_balance + total_income - total_expenses
+    else:
+        current_balance = None
+
+    return {
+        "breakdown": [{"name": name, "value": round(float(value), 2)} for name, value in by_category.items()],
+        "total_expenses": round(total_expenses, 2),
+        "total_income": round(total_income, 2),
+        "current_balance": round(current_balance, 2) if current_balance is not None else None,
+        "transaction_count": int(len(df)),
+    }
+
+def analyze_locally(text: str) -> Optional[dict]:
+    return build_chart_data(extract_transactions(text))
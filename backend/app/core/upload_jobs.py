@@ -0,0 +1,178 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .metrics import metrics
+
+# Uploads processed at the same time; the rest wait in the queue
+MAX_WORKERS = 2
+MAX_QUEUED = 32
+# Finished jobs (and their results) kept for status lookups and dedup
+MAX_JOBS = 200
+
+class QueueFullError(Exception):
+    pass
+
+class UploadJob:
+    def __init__(self, digest: str, filename: str, session_id: str):
+        self.id = uuid.uuid4().hex
+        self.digest = digest
+        self.filename = filename
+        self.session_id = session_id
+        self.status = "queued" # queued -> running -> done | failed
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        # Runner state reused when the job is deduplicated later; never sent to clients
+        self.extra: Dict[str, object] = {}
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.done = asyncio.Event()
+
+    def update(self, stage: str, progress: float):
+        self.stage = stage
+        self.progress = progress
+        self.updated_at = time.time()
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        data = {
+            "job_id": self.id,
+            "filename": self.filename,
+            "sha256": self.digest,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 2),
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+Runner = Callable[[UploadJob], Awaitable[dict]]
+
+class UploadJobQueue:
+    """
+    Background processing for uploads. Jobs are keyed by the SHA-256 of the file and the
+    session: re-uploading a file that is queued or running joins that job, and one that already
+    finished returns its result straight away. The session is part of the key because the
+    result was masked with that session's tokens. A fixed number of worker tasks bounds how
+    many uploads are parsed/analyzed at once; the queue behind them is bounded too.
+    """
+    def __init__(self, max_workers: int = MAX_WORKERS, max_queued: int = MAX_QUEUED, max_jobs: int = MAX_JOBS):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, UploadJob]" = OrderedDict()
+        self._by_key: Dict[Tuple[str, str], str] = {} # (digest, session_id) -> job id
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self.stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0}
+
+    def _ensure_workers(self):
+        # Created lazily so they bind to the server's running loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+
+    def find(self, digest: str, session_id: str) -> Optional[UploadJob]:
+        job_id = self._by_key.get((digest, session_id))
+        return self.jobs.get(job_id) if job_id else None
+
+    def submit(self, digest: str, filename: str, session_id: str, runner: Runner,
+               on_duplicate: Optional[Callable[[], None]] = None) -> Tuple[UploadJob, bool]:
+        """
+        Returns (job, deduplicated). A failed earlier job is retried with a fresh one.
+        `on_duplicate` is called when the runner won't be used (e.g. to close the spooled file):
+        here for a duplicate, or at shutdown for a job that never started.
+        """
+        existing = self.find(digest, session_id)
+        if existing is not None and existing.status != "failed":
+            self.stats["deduplicated"] += 1
+            self.jobs.move_to_end(existing.id)
+            if on_duplicate:
+                on_duplicate()
+            return existing, True
+
+        self._ensure_workers()
+        if self._queue.full():
+            raise QueueFullError("Too many uploads are waiting; try again shortly")
+
+        job = UploadJob(digest, filename, session_id)
+        self.jobs[job.id] = job
+        self._by_key[(digest, session_id)] = job.id
+        self._queue.put_nowait((job, runner, on_duplicate))
+        self.stats["submitted"] += 1
+        self._evict()
+        return job, False
+
+    def _evict(self):
+        # Drop the oldest finished jobs past the cap; queued/running ones are never dropped
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            job = self.jobs[job_id]
+            if job.status in ("done", "failed"):
+                del self.jobs[job_id]
+                key = (job.digest, job.session_id)
+                if self._by_key.get(key) == job_id:
+                    del self._by_key[key]
+
+    async def _worker(self):
+        queue = self._queue # shutdown() drops self._queue while workers are being cancelled
+        while True:
+            job, runner, _ = await queue.get()
+            job.status = "running"
+            job.update("starting", 0.0)
+            try:
+                with metrics.span("upload.job"):
+                    job.result = await runner(job)
+                job.status = "done"
+                job.update("done", 1.0)
+                self.stats["completed"] += 1
+            except asyncio.CancelledError:
+                self._fail(job, "Server shut down before the upload finished")
+                raise
+            except Exception as e:
+                print(f"ERROR: Upload job {job.id} ({job.filename}) failed: {e}")
+                self._fail(job, str(e))
+            finally:
+                job.done.set()
+                queue.task_done()
+
+    def _fail(self, job: UploadJob, error: str):
+        job.status = "failed"
+        job.error = error
+        job.update("failed", job.progress)
+        self.stats["failed"] += 1
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        return self.jobs.get(job_id)
+
+    def recent(self, limit: int = 20) -> list:
+        jobs = list(self.jobs.values())[-limit:]
+        return [job.to_dict(include_result=False) for job in reversed(jobs)]
+
+    def get_stats(self) -> dict:
+        active = sum(1 for job in self.jobs.values() if job.status in ("queued", "running"))
+        return {**self.stats, "active": active, "tracked": len(self.jobs), "workers": self.max_workers}
+
+    async def shutdown(self):
+        """Cancels running jobs and fails queued ones, so nothing waiting on job.done hangs."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        queue, self._queue = self._queue, None
+        while queue is not None and not queue.empty():
+            job, _, release = queue.get_nowait()
+            if release:
+                release()
+            self._fail(job, "Server shut down before the upload started")
+            job.done.set()
+
+upload_jobs = UploadJobQueue()
@@ -1,15 +1,68 @@
 import sqlite3
+import hashlib
+import hmac
 import os
+import re
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from cryptography.fernet import Fernet
 from datetime import datetime
+from typing import Iterator, List, Optional
+
+from .metrics import metrics
+
+# Applied to every connection. WAL lets readers run while the writer commits;
+# synchronous=NORMAL only fsyncs at checkpoints, which is safe in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000", # ~8 MB page cache
+    "PRAGMA mmap_size=67108864", # 64 MB
+    "PRAGMA busy_timeout=5000",
+)
+
+# Blind index: keywords are stored as truncated HMACs, never in plaintext
+SEARCH_WORD = re.compile(r"[a-z0-9]{2,}")
+SEARCH_INDEX_VERSION = "1"
+
+MAX_PAGE_SIZE = 1000
+# Pages at least this big are decrypted on a thread pool
+PARALLEL_DECRYPT_ROWS = 200
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+def _decrypt_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 2), thread_name_prefix="vault-decrypt")
+    return _pool
 
 class Vault:
-    def __init__(self, db_path="pennywise.db"):
+    def __init__(self, db_path="pennywise.db", read_pool_size: int = 4, batch_size: int = 256):
         self.db_path = db_path
         self.key = self._load_or_generate_key()
         self.cipher = Fernet(self.key)
+        # Separate key for the search index, derived so the Fernet key itself is never reused
+        self._index_key = hmac.new(self.key, b"pennywise-blind-index", hashlib.sha256).digest()
+        self.batch_size = batch_size
+
+        self._writer_conn = self._connect()
         self._init_db()
 
+        # Small pool of read connections, handed out one per caller
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(read_pool_size):
+            self._readers.put(self._connect())
+
+        # Writes are queued and committed by one background thread in batches
+        self._writes: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._writer_loop, name="vault-writer", daemon=True)
+        self._writer.start()
+
     def _load_or_generate_key(self):
         # In a real app, this key would be derived from a user password and not stored loosely.
         # For this prototype, we store it in a .key file to persist between restarts.
@@ -23,45 +76,293 @@ class Vault:
                 f.write(key)
             return key
 
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        c = self._writer_conn.cursor()
         c.execute('''CREATE TABLE IF NOT EXISTS history
                      (id INTEGER PRIMARY KEY AUTOINCREMENT,
                       timestamp TEXT,
                       role TEXT,
                       encrypted_content TEXT)''')
-        conn.commit()
-        conn.close()
+        # Filtered pages walk these instead of scanning the table
+        c.execute("CREATE INDEX IF NOT EXISTS idx_history_role_id ON history (role, id)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp)")
+        c.execute('''CREATE TABLE IF NOT EXISTS history_terms
+                     (term TEXT,
+                      event_id INTEGER,
+                      PRIMARY KEY (term, event_id)) WITHOUT ROWID''')
+        c.execute("CREATE TABLE IF NOT EXISTS vault_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._writer_conn.commit()
+
+        row = c.execute("SELECT value FROM vault_meta WHERE key = 'search_index_version'").fetchone()
+        if not row or row[0] != SEARCH_INDEX_VERSION:
+            self._rebuild_search_index()
+
+    def _terms(self, text: str) -> List[str]:
+        """Distinct keyword tokens for a text: HMAC(index key, word), truncated to 128 bits."""
+        words = set(SEARCH_WORD.findall(text.lower()))
+        return [hmac.new(self._index_key, w.encode(), hashlib.sha256).hexdigest()[:32] for w in words]
+
+    def _index_event(self, conn: sqlite3.Connection, event_id: int, content: str):
+        conn.executemany("INSERT OR IGNORE INTO history_terms (term, event_id) VALUES (?, ?)",
+                         [(term, event_id) for term in self._terms(content)])
+
+    def _rebuild_search_index(self):
+        """One-off backfill for rows written before the index existed (runs at startup)."""
+        conn = self._writer_conn
+        with conn:
+            conn.execute("DELETE FROM history_terms")
+            for event_id, enc_content in conn.execute("SELECT id, encrypted_content FROM history").fetchall():
+                try:
+                    content = self.cipher.decrypt(enc_content.encode()).decode()
+                except Exception:
+                    continue
+                self._index_event(conn, event_id, content)
+            conn.execute("INSERT OR REPLACE INTO vault_meta (key, value) VALUES ('search_index_version', ?)",
+                         (SEARCH_INDEX_VERSION,))
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrows a pooled read connection."""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def schema(self, ddl: str):
+        """
+        Runs DDL for tables other modules keep in the vault db. Queued like any write, but the
+        writer runs it on its own between batches (executescript commits whatever is open).
+        """
+        future = Future()
+        self._writes.put(("schema", ddl, future))
+        future.result()
+
+    def submit(self, sql: str, params=()) -> Future:
+        """Queues a write; the returned future resolves to the rowcount once it is committed."""
+        future = Future()
+        self._writes.put(("sql", (sql, params), future))
+        return future
+
+    def execute(self, sql: str, params=()) -> int:
+        """Queues a write and waits for its commit. Returns the rowcount."""
+        return self.submit(sql, params).result()
+
+    def transact(self, fn):
+        """
+        Runs fn(conn) on the writer thread inside the current batch transaction and
+        returns its result once committed. For read-modify-write sequences that must be atomic.
+        """
+        future = Future()
+        self._writes.put(("call", fn, future))
+        return future.result()
 
-    def add_event(self, role: str, content: str):
-        """Encrypts and saves a chat event."""
-        encrypted_content = self.cipher.encrypt(content.encode()).decode()
+    def _writer_loop(self):
+        held = [] # An item that ended the last batch early
+        while True:
+            item = held.pop() if held else self._writes.get()
+            if item is None:
+                return
+            if item[0] == "schema":
+                self._run_schema(*item[1:])
+                continue
+            batch = [item]
+            # Everything that queued up while the previous batch was committing goes into
+            # the same transaction - busy periods batch themselves, quiet ones don't wait
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None or item[0] == "schema":
+                    held.append(item) # Handled after this batch commits
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+
+    def _run_schema(self, ddl: str, future: Future):
+        try:
+            self._writer_conn.executescript(ddl)
+            self._writer_conn.commit()
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+
+    def _apply(self, conn: sqlite3.Connection, kind: str, payload):
+        if kind == "event":
+            timestamp, role, content = payload
+            encrypted_content = self.cipher.encrypt(content.encode()).decode()
+            cur = conn.execute("INSERT INTO history (timestamp, role, encrypted_content) VALUES (?, ?, ?)",
+                               (timestamp, role, encrypted_content))
+            self._index_event(conn, cur.lastrowid, content)
+            return cur.rowcount
+        if kind == "call":
+            return payload(conn)
+        if kind == "flush":
+            return None
+        sql, params = payload
+        return conn.execute(sql, params).rowcount
+
+    @metrics.timed("vault.write_batch")
+    def _write_batch(self, batch):
+        """
+        One transaction and one commit for the whole batch, with a savepoint per item:
+        an item that raises is rolled back on its own and only its caller sees the error.
+        """
+        conn = self._writer_conn
+        results, failures = [], []
+        try:
+            conn.execute("BEGIN")
+            for kind, payload, future in batch:
+                conn.execute("SAVEPOINT item")
+                try:
+                    result = self._apply(conn, kind, payload)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO item")
+                    failures.append((future, e))
+                else:
+                    results.append((future, result))
+                conn.execute("RELEASE item")
+            conn.commit()
+        except Exception as e:
+            # The commit itself failed: nothing in the batch was written
+            print(f"ERROR: Vault batch write failed: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        metrics.inc("pennywise_vault_writes_total", sum(1 for kind, _, _ in batch if kind != "flush") - len(failures))
+        for future, result in results:
+            future.set_result(result)
+        for future, e in failures:
+            future.set_exception(e)
+
+    def add_event(self, role: str, content: str) -> Future:
+        """Encrypts and saves a chat event (in the background writer)."""
         timestamp = datetime.now().isoformat()
-        
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("INSERT INTO history (timestamp, role, encrypted_content) VALUES (?, ?, ?)",
-                  (timestamp, role, encrypted_content))
-        conn.commit()
-        conn.close()
-
-    def get_history(self):
-        """Retrieves and decrypts chat history."""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("SELECT timestamp, role, encrypted_content FROM history ORDER BY id DESC LIMIT 50")
-        rows = c.fetchall()
-        conn.close()
-
-        history = []
-        for ts, role, enc_content in rows:
-            try:
-                decrypted = self.cipher.decrypt(enc_content.encode()).decode()
-                history.append({"timestamp": ts, "role": role, "content": decrypted})
-            except:
-                history.append({"timestamp": ts, "role": role, "content": "[DECRYPTION ERROR]"})
-        
-        return history[::-1] # Return chronological order
-
-vault = Vault()
+        future = Future()
+        self._writes.put(("event", (timestamp, role, content), future))
+        return future
+
+    def flush(self):
+        """
+        Blocks until every write queued before this call is committed. Writes queued
+        afterwards don't hold it up, so a reader can't be starved by a steady write stream.
+        """
+        if not self._closed:
+            future = Future()
+            self._writes.put(("flush", None, future))
+            future.result()
+
+    def close(self):
+        """Flushes pending writes and stops the writer. Called on app shutdown."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._writes.put(None)
+        self._writer.join(timeout=5)
+        while not self._readers.empty():
+            self._readers.get().close()
+        self._writer_conn.close()
+
+    def _decrypt_row(self, row) -> dict:
+        row_id, ts, role, enc_content = row
+        try:
+            decrypted = self.cipher.decrypt(enc_content.encode()).decode()
+        except Exception:
+            decrypted = "[DECRYPTION ERROR]"
+        return {"id": row_id, "timestamp": ts, "role": role, "content": decrypted}
+
+    def _decrypt_rows(self, rows) -> List[dict]:
+        if len(rows) < PARALLEL_DECRYPT_ROWS:
+            return [self._decrypt_row(row) for row in rows]
+        return list(_decrypt_pool().map(self._decrypt_row, rows))
+
+    @metrics.timed("vault.history")
+    def get_history(self, limit: int = 50, before_id: Optional[int] = None, role: Optional[str] = None,
+                    since: Optional[str] = None, until: Optional[str] = None) -> dict:
+        """
+        One page of decrypted history, newest page first but returned in chronological order.
+        Keyset pagination on id: pass the returned `next_cursor` as `before_id` to go further back.
+        `since`/`until` are ISO timestamps (inclusive / exclusive). Only the returned rows are decrypted.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        if role:
+            clauses.append("role = ?")
+            params.append(role)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        # Make sure events queued by this process are visible
+        self.flush()
+        with self.reader() as conn:
+            # One extra row tells us whether there is an older page, without a COUNT(*)
+            rows = conn.execute(
+                f"SELECT id, timestamp, role, encrypted_content FROM history {where} ORDER BY id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = self._decrypt_rows(rows)
+        items.reverse() # Return chronological order
+
+        return {
+            "items": items,
+            "next_cursor": rows[-1][0] if has_more else None,
+        }
+
+    @metrics.timed("vault.search")
+    def search(self, query: str, limit: int = 50, before_id: Optional[int] = None) -> dict:
+        """
+        Events containing every keyword in `query`, newest first, paged like get_history.
+        The lookup runs on the blind index; only the matching rows are decrypted.
+        """
+        terms = self._terms(query)
+        if not terms:
+            return {"items": [], "next_cursor": None}
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        placeholders = ",".join("?" * len(terms))
+        cursor_clause = "AND event_id < ?" if before_id is not None else ""
+        params = [*terms, *([before_id] if before_id is not None else []), len(terms), limit + 1]
+
+        self.flush()
+        with self.reader() as conn:
+            ids = [r[0] for r in conn.execute(
+                f"""SELECT event_id FROM history_terms
+                    WHERE term IN ({placeholders}) {cursor_clause}
+                    GROUP BY event_id HAVING COUNT(*) = ?
+                    ORDER BY event_id DESC LIMIT ?""",
+                params,
+            ).fetchall()]
+            has_more = len(ids) > limit
+            ids = ids[:limit]
+            rows = conn.execute(
+                f"SELECT id, timestamp, role, encrypted_content FROM history WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id DESC",
+                ids,
+            ).fetchall() if ids else []
+
+        return {
+            "items": self._decrypt_rows(rows),
+            "next_cursor": ids[-1] if has_more else None,
+        }
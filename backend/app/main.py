@@ -1,17 +1,44 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import time
+_import_started = time.perf_counter()
+
+from fastapi import Depends, FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-from .core.masking import engine as masking_engine
-from .core.gemini_client import gemini_client
-from .core.pdf_parser import extract_text_from_pdf
-from .core.finance import finance_engine
-from .core.vault import vault
-import uvicorn
+from contextlib import asynccontextmanager
+from .core import services
+from .core.services import DEFAULT_USER, get_finance_engine, get_gemini_client, get_market_engine, get_response_cache, get_vault
+from .core.masking import store as masking_store, DEFAULT_SESSION
+from .core.pdf_parser import claim_upload, extract_text_from_pdf, shutdown_pool, PDFLimitError
+from .core.response_cache import make_key
+from .core.statement_analysis import analyze_statement, NARRATIVE_PROMPT
+from .core.ledger_import import ImportLimitError, LedgerImporter, MAX_IMPORT_BYTES
+from .core.metrics import metrics, MetricsMiddleware
+from .core.upload_jobs import upload_jobs, UploadJob, QueueFullError
+import asyncio
+import hashlib
+from datetime import date, timedelta
+import json
 import os
 
-app = FastAPI()
+# Heavy subsystems (Vault, ledger, market, Gemini) are built lazily by core.services, so importing
+# this module stays cheap: the desktop shell waits on it before it can show anything.
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print(f"DEBUG: Backend ready, app imported in {IMPORT_SECONDS * 1000:.0f} ms")
+    # Build everything in the background; a request that needs something first just waits for it
+    services.start_warm_up()
+    yield
+    await upload_jobs.shutdown()
+    shutdown_pool()
+    services.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,6 +51,7 @@ class ChatRequest(BaseModel):
     message: str
     mode: str = "coach" # coach or roast
     api_key: Optional[str] = None
+    session_id: str = DEFAULT_SESSION
 
 class ChatResponse(BaseModel):
     response: str
@@ -34,84 +62,97 @@ class ChatResponse(BaseModel):
 
 @app.get("/")
 def read_root():
+    # Health check: answers before any subsystem is built
     return {"status": "PennyWise Backend Active"}
 
+@app.get("/startup")
+def get_startup_profile():
+    """How long the app import and each subsystem's first build took, and what is built so far."""
+    return {
+        "import_ms": round(IMPORT_SECONDS * 1000, 1),
+        "init_ms": {name: round(seconds * 1000, 1) for name, seconds in services.init_times.items()},
+        "ready": {service.name: service.ready for service in services.ALL},
+    }
+
 import io
 
 # ...
 
-@app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    print(f"DEBUG: Received file upload: {file.filename}, type: {file.content_type}")
-    if file.content_type != "application/pdf":
-         raise HTTPException(status_code=400, detail="Only PDF files are supported for now.")
-    
-    content = await file.read()
-    
-    # Extract text using helper
-    raw_text = extract_text_from_pdf(content)
-    
+def sync_upload_balance(finance_engine, chart_data: Optional[dict], recompute_safe_to_spend: bool = False):
+    """Moves the engine's balance to the one read from a statement, if it had one."""
+    if not chart_data:
+        return
+    if chart_data.get("current_balance") is not None:
+        finance_engine.set_balance(float(chart_data["current_balance"]))
+        print(f"DEBUG: FinanceEngine balance updated to {finance_engine.current_balance}")
+    if recompute_safe_to_spend:
+        # Without a statement balance this is based on the balance already in the ledger
+        chart_data["safe_to_spend"] = max(0.0, round(finance_engine.get_safe_to_spend(), 2))
+
+def record_upload(filename: str):
+    # Save event to Vault
+    get_vault().add_event("system", f"Encrypted and Processed File: {filename}")
+
+async def process_upload(job: UploadJob, spool) -> dict:
+    """Parses, masks and analyzes one uploaded statement. Runs on an upload worker."""
+    with spool:
+        job.update("extracting", 0.1)
+        raw_text = await asyncio.to_thread(extract_text_from_pdf, spool)
+
     if not raw_text.strip():
         # Fallback for scanned PDFs or empty files (Mocking data for demo continuity if real extraction fails)
         print("DEBUG: Empty text extracted. Using mock data for demo.")
         raw_text = "Bank Statement for USER_A. Spending: Netflix $15, Gym $50, Food $200. Balance $5000."
-    
+
+    job.update("masking", 0.3)
+    masking_engine = masking_store.get(job.session_id)
     masked_text, logs = masking_engine.mask(raw_text)
     
-    chart_data = None
-    
-    system_prompt = (
-        "You are a financial analyst. Analyze this bank statement text. "
-        "1. Provide a textual summary of spending habits and advice.\n"
-        "2. EXTREMELY IMPORTANT: You must ALSO output a valid JSON block at the very end of your response inside [[JSON: ... ]] markers.\n"
-        "The JSON must have this structure: \n"
-        "{ \"breakdown\": [{\"name\": \"Food\", \"value\": 100}, ...], \"safe_to_spend\": 5000, \"total_expenses\": 10000, \"current_balance\": 50000 }\n"
-        "Estimate the values based on the text provided. If valid data is missing, make reasonable estimates for a demo.\n"
-        "CRITICAL: For 'safe_to_spend', if you cannot find an opening balance, ASSUME a starting balance of 50000. Do not return negative values."
-    )
-    
+    # Built off the event loop in case warm-up hasn't got to them yet
+    response_cache = await asyncio.to_thread(get_response_cache)
+    gemini_client = await asyncio.to_thread(get_gemini_client)
+    finance_engine = await asyncio.to_thread(get_finance_engine)
+
+    async def generate(prompt: str, system_instruction: str) -> str:
+        return await response_cache.generate(gemini_client, prompt, system_instruction=system_instruction)
+
+    # pandas is only needed here and by the ledger; imported on first use
+    from .core.transactions import analyze_locally
+
+    # Chart numbers come from the local parser (deterministic, milliseconds); raw text never leaves the machine
+    local_chart = await asyncio.to_thread(analyze_locally, raw_text)
+
+    job.update("analyzing", 0.5)
     try:
-        analysis = await gemini_client.generate_response(masked_text, system_instruction=system_prompt)
-        
-        # Extract JSON from response
-        import re
-        import json
-        
-        json_match = re.search(r'\[\[JSON:\s*(\{.*?\})\s*\]\]', analysis, re.DOTALL)
-        if json_match:
-            try:
-                json_str = json_match.group(1)
-                chart_data = json.loads(json_str)
-                
-                # --- SYNC BALANCE WITH ENGINE ---
-                if "current_balance" in chart_data:
-                    finance_engine.current_balance = float(chart_data["current_balance"])
-                    print(f"DEBUG: FinanceEngine balance updated to {finance_engine.current_balance}")
-                # --------------------------------
-
-                # Remove the JSON block from the textual analysis
-                analysis = analysis.replace(json_match.group(0), "").strip()
-            except Exception as parse_error:
-                print(f"Error parsing JSON: {parse_error}")
+        # Large statements are split into chunks and analyzed concurrently, then merged
+        if local_chart:
+            analysis, _ = await analyze_statement(masked_text, generate, prompt=NARRATIVE_PROMPT)
+            chart_data = local_chart
         else:
-            print("No JSON block found in AI response.")
-        
+            analysis, chart_data = await analyze_statement(masked_text, generate)
+            if chart_data is None:
+                print("No JSON block found in AI response.")
+
+        # set_balance waits on a Vault write; keep that off the event loop
+        job.extra["recompute_safe_to_spend"] = bool(local_chart)
+        await asyncio.to_thread(sync_upload_balance, finance_engine, chart_data, bool(local_chart))
+
     except Exception as e:
         print(f"ERROR in Gemini Analysis: {e}")
         analysis = f"Analysis failed: {str(e)}"
         chart_data = None
 
+    job.update("saving", 0.9)
     # Unmask the text portion of the analysis for the user
     # (The JSON block is hidden/removed by frontend anyway, but unmasking is good practice)
     final_message = masking_engine.unmask(analysis)
 
     preview = masked_text[:500] + ("..." if len(masked_text) > 500 else "")
     
-    # Save event to Vault
-    vault.add_event("system", f"Encrypted and Processed File: {file.filename}")
+    record_upload(job.filename)
 
     return {
-        "filename": file.filename,
+        "filename": job.filename,
         "extracted_text_preview": preview,
         "full_masked_text_length": len(masked_text),
         "logs": logs,
@@ -119,46 +160,111 @@ async def upload_file(file: UploadFile = File(...)):
         "chart_data": chart_data 
     }
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+@app.post("/upload", status_code=202)
+async def upload_file(response: Response, file: UploadFile = File(...), session_id: str = Form(DEFAULT_SESSION),
+                      wait: bool = False):
+    """
+    Queues a statement for analysis and returns its job right away (202); poll /upload/jobs/{job_id}.
+    The same file (by SHA-256) uploaded again in the same session returns the existing job - with its
+    result if it is done, in which case the balance sync and Vault event are applied again.
+    `?wait=true` blocks until the job finishes, like the old synchronous endpoint.
+    A finished job is returned with 200.
+    """
+    print(f"DEBUG: Received file upload: {file.filename}, type: {file.content_type}")
+    if file.content_type != "application/pdf":
+         raise HTTPException(status_code=400, detail="Only PDF files are supported for now.")
+
+    # Starlette already spooled the upload (to disk for big files); the job keeps that file
+    hasher = hashlib.sha256()
+    try:
+        spool = await asyncio.to_thread(claim_upload, file, hasher=hasher)
+    except PDFLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        job, deduplicated = upload_jobs.submit(hasher.hexdigest(), file.filename, session_id,
+                                               lambda job: process_upload(job, spool), on_duplicate=spool.close)
+    except QueueFullError as e:
+        spool.close()
+        raise HTTPException(status_code=429, detail=str(e))
+    if deduplicated:
+        print(f"DEBUG: Duplicate upload of {file.filename}, reusing job {job.id}")
+        if job.status == "done":
+            # The analysis is reused, but its effects may have been undone since (e.g. /ledger/reset)
+            finance_engine = await asyncio.to_thread(get_finance_engine)
+            chart_data = (job.result or {}).get("chart_data")
+            await asyncio.to_thread(sync_upload_balance, finance_engine, chart_data,
+                                    job.extra.get("recompute_safe_to_spend", False))
+            record_upload(job.filename)
+
+    if wait:
+        await job.done.wait()
+    if job.status == "done":
+        response.status_code = 200
+    return {**job.to_dict(), "deduplicated": deduplicated}
+
+@app.get("/upload/jobs")
+def list_upload_jobs(limit: int = 20):
+    return {"jobs": upload_jobs.recent(limit), "stats": upload_jobs.get_stats()}
+
+@app.get("/upload/jobs/{job_id}")
+def get_upload_job(job_id: str):
+    job = upload_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+CHAT_PERSONAS = {
+    "roast": "You are PennyWise, a savage, roasting financial assistant. Roast use of money. Use Gen-Z slang.",
+    "coach": "You are PennyWise, a supportive financial coach. Be strict about affordability.",
+}
+
+CHAT_INSTRUCTIONS = (
+    "--- INSTRUCTIONS ---\n"
+    "1. SOLVENCY: If user wants to buy something, checks Cost vs Safe-to-Spend. If Cost > Safe-to-Spend, say 'REJECTED'.\n"
+    "2. SUBSCRIPTIONS: If user asks about 'leaks', 'subscriptions', or 'extra cash', list the UNUSED_LEAK items from report.\n"
+    "3. INVESTMENTS: If user asks about 'investing' or 'growth', use the INVESTMENT OPTIONS data. Suggest a mix based on risk.\n"
+    "4. LOANS: If user asks about 'loans', 'borrowing', or 'credit', compare the LOAN OFFERS provided. Suggest SBI for education. WARN about interest rates.\n"
+    "5. SCHOLARSHIPS: If user asks about 'tuition', 'college costs', or 'student loans', ALWAYS suggest checking the SCHOLARSHIP OPPORTUNITIES first before taking debt.\n"
+    "6. PRIVACY: You only see tokens (USER_A). Do not mention that you see tokens, just answer naturally.\n"
+)
+
+# Static text around the live data, built once per mode: (before context, after context)
+CHAT_PROMPTS = {
+    mode: (f"{persona}\n\n--- LIVE FINANCIAL DATA ---\n", f"\n{CHAT_INSTRUCTIONS}")
+    for mode, persona in CHAT_PERSONAS.items()
+}
+
+def _prepare_chat(request: ChatRequest, gemini_client, finance_engine):
+    """
+    Masks the message and assembles the system prompt. Shared by /chat and /chat/stream.
+    Runs on a worker thread: configure() may import the Gemini SDK and the context may read the Vault.
+    """
     # 0. Configure API Key
     if request.api_key:
         gemini_client.configure(request.api_key)
 
-    # 1. Masking
+    # 1. Masking (tokens are scoped to the caller's session)
+    masking_engine = masking_store.get(request.session_id)
     masked_text, logs = masking_engine.mask(request.message)
 
-    # 2. Financial Ecosystem Injection (The "Skills")
-    fin_context = finance_engine.get_financial_context()
-    sub_report = finance_engine.get_subscription_report()
-    invest_opts = finance_engine.get_investment_options()
-    loan_offers = finance_engine.get_loan_offers()
-    sch_opps = finance_engine.get_scholarship_opportunities()
-    
-    full_context = f"{fin_context}\n\n{sub_report}\n\n{invest_opts}\n\n{loan_offers}\n\n{sch_opps}"
+    # 2. Financial Ecosystem Injection (The "Skills") - cached until the ledger changes
+    with metrics.span("finance.chat_context"):
+        full_context = finance_engine.get_chat_context()
 
     # 3. System Prompt
-    base_prompt = ""
-    if request.mode == "roast":
-        base_prompt = "You are PennyWise, a savage, roasting financial assistant. Roast use of money. Use Gen-Z slang."
-    else:
-        base_prompt = "You are PennyWise, a supportive financial coach. Be strict about affordability."
-
-    system_prompt = (
-        f"{base_prompt}\n\n"
-        f"--- LIVE FINANCIAL DATA ---\n"
-        f"{full_context}\n"
-        f"--- INSTRUCTIONS ---\n"
-        f"1. SOLVENCY: If user wants to buy something, checks Cost vs Safe-to-Spend. If Cost > Safe-to-Spend, say 'REJECTED'.\n"
-        f"2. SUBSCRIPTIONS: If user asks about 'leaks', 'subscriptions', or 'extra cash', list the UNUSED_LEAK items from report.\n"
-        f"3. INVESTMENTS: If user asks about 'investing' or 'growth', use the INVESTMENT OPTIONS data. Suggest a mix based on risk.\n"
-        f"4. LOANS: If user asks about 'loans', 'borrowing', or 'credit', compare the LOAN OFFERS provided. Suggest SBI for education. WARN about interest rates.\n"
-        f"5. SCHOLARSHIPS: If user asks about 'tuition', 'college costs', or 'student loans', ALWAYS suggest checking the SCHOLARSHIP OPPORTUNITIES first before taking debt.\n"
-        f"6. PRIVACY: You only see tokens (USER_A). Do not mention that you see tokens, just answer naturally.\n"
-    )
+    head, tail = CHAT_PROMPTS.get(request.mode, CHAT_PROMPTS["coach"])
+    system_prompt = f"{head}{full_context}{tail}"
+
+    return masking_engine, masked_text, logs, system_prompt
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(request: ChatRequest, gemini_client=Depends(get_gemini_client),
+                        finance_engine=Depends(get_finance_engine), response_cache=Depends(get_response_cache)):
+    masking_engine, masked_text, logs, system_prompt = await asyncio.to_thread(_prepare_chat, request, gemini_client, finance_engine)
 
     # 4. AI Generation
-    ai_raw_response = await gemini_client.generate_response(masked_text, system_instruction=system_prompt)
+    ai_raw_response = await response_cache.generate(gemini_client, masked_text, system_instruction=system_prompt)
 
     # 5. Unmasking
     final_response = masking_engine.unmask(ai_raw_response)
@@ -171,12 +277,83 @@ async def chat_endpoint(request: ChatRequest):
         mode=request.mode
     )
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, gemini_client=Depends(get_gemini_client),
+                               finance_engine=Depends(get_finance_engine), response_cache=Depends(get_response_cache)):
+    """
+    Same as /chat, but the reply is sent as Server-Sent Events while Gemini generates it:
+    'delta' events carry unmasked text, a final 'done' event carries the logs and metadata.
+    """
+    masking_engine, masked_text, logs, system_prompt = await asyncio.to_thread(_prepare_chat, request, gemini_client, finance_engine)
+
+    cache_key = make_key(masked_text, system_prompt, gemini_client.model_name)
+    cached = await response_cache.get_async(cache_key)
+
+    async def event_stream():
+        if cached is not None:
+            yield _sse("delta", {"text": masking_engine.unmask(cached)})
+        else:
+            unmasker = masking_engine.stream_unmasker()
+            raw_chunks = []
+            status = {}
+            async for chunk in gemini_client.stream_response(masked_text, system_instruction=system_prompt, status=status):
+                raw_chunks.append(chunk)
+                text = unmasker.feed(chunk)
+                if text:
+                    yield _sse("delta", {"text": text})
+            tail = unmasker.flush()
+            if tail:
+                yield _sse("delta", {"text": tail})
+            # A stream that failed part way still has partial text; never cache it
+            if not status.get("failed"):
+                response_cache.put(cache_key, gemini_client.model_name, "".join(raw_chunks))
+
+        yield _sse("done", {
+            "original_prompt": request.message,
+            "masked_prompt": masked_text,
+            "logs": logs,
+            "mode": request.mode,
+            "cached": cached is not None,
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/vault/history")
-def get_vault_history():
-    return vault.get_history()
+def get_vault_history(limit: int = 50, before_id: Optional[int] = None, role: Optional[str] = None,
+                      since: Optional[str] = None, until: Optional[str] = None, vault=Depends(get_vault)):
+    return vault.get_history(limit=limit, before_id=before_id, role=role, since=since, until=until)
+
+@app.get("/vault/search")
+def search_vault(q: str, limit: int = 50, before_id: Optional[int] = None, vault=Depends(get_vault)):
+    return vault.search(q, limit=limit, before_id=before_id)
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of the in-process counters and latency histograms."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/summary")
+def get_metrics_summary():
+    """Count, mean and estimated p50/p95/p99 per span, for a quick look without Prometheus."""
+    return metrics.summary()
+
+@app.get("/cache/stats")
+def get_cache_stats(response_cache=Depends(get_response_cache)):
+    return response_cache.get_stats()
+
+@app.post("/cache/clear")
+def clear_cache(response_cache=Depends(get_response_cache)):
+    return {"status": "cleared", "removed": response_cache.invalidate()}
 
 @app.get("/finance/summary")
-def get_finance_summary():
+def get_finance_summary(finance_engine=Depends(get_finance_engine)):
     return finance_engine.get_summary()
 
 class TransactionRequest(BaseModel):
@@ -185,28 +362,183 @@ class TransactionRequest(BaseModel):
     type: str # IN or OUT
 
 @app.get("/ledger")
-def get_ledger():
-    return finance_engine.get_ledger()
+def get_ledger(limit: int = 50, before_id: Optional[int] = None, finance_engine=Depends(get_finance_engine)):
+    return finance_engine.get_ledger(limit=limit, before_id=before_id)
+
+@app.get("/ledger/stats")
+def get_ledger_stats(start: Optional[date] = None, end: Optional[date] = None,
+                     finance_engine=Depends(get_finance_engine)):
+    """Totals, averages and category split for a date range (default: last 30 days)."""
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return finance_engine.ledger.rollup.totals(start, end)
+
+@app.get("/ledger/stats/monthly")
+def get_ledger_monthly(months: int = 12, finance_engine=Depends(get_finance_engine)):
+    return finance_engine.ledger.rollup.monthly_series(months)
+
+@app.get("/ledger/stats/burn")
+def get_ledger_burn(days: int = 30, finance_engine=Depends(get_finance_engine)):
+    burn = finance_engine.ledger.rollup.burn_rate(max(1, days))
+    balance = finance_engine.current_balance
+    burn["balance"] = balance
+    # Days until the balance runs out at the current pace
+    burn["runway_days"] = round(balance / burn["daily_burn"], 1) if burn["daily_burn"] > 0 else None
+    return burn
+
+@app.post("/ledger/bulk")
+async def bulk_import_ledger(request: Request, format: Optional[str] = None,
+                             finance_engine=Depends(get_finance_engine)):
+    """
+    Streams a CSV (date,description,amount,type) or NDJSON body into the ledger.
+    Valid rows go in with one transaction; invalid ones are reported by line number.
+    The format comes from ?format= or the Content-Type header.
+    Bodies over MAX_IMPORT_BYTES or MAX_IMPORT_ROWS are rejected with 413.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_IMPORT_BYTES:
+        raise HTTPException(status_code=413, detail=f"Import is larger than {MAX_IMPORT_BYTES // (1024 * 1024)} MB")
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "json" in content_type else "csv"
+    try:
+        importer = LedgerImporter(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    start = time.perf_counter()
+    try:
+        # Parsing is CPU-bound (~1 s per 100k rows); each chunk is parsed on a worker thread so
+        # the event loop keeps serving other requests and streams during an import
+        async for chunk in request.stream():
+            await asyncio.to_thread(importer.feed, chunk)
+        await asyncio.to_thread(importer.finish)
+    except ImportLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = await asyncio.to_thread(finance_engine.add_transactions_bulk, importer.rows)
+    elapsed = time.perf_counter() - start
+    total_rows = len(importer.rows) + importer.failed
+
+    return {
+        "inserted": result["inserted"],
+        "failed": importer.failed,
+        "errors": importer.errors,
+        "balance": result["balance"],
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(total_rows / elapsed) if elapsed > 0 else None,
+    }
 
 @app.post("/ledger/reset")
-def reset_ledger():
+def reset_ledger(finance_engine=Depends(get_finance_engine)):
     return finance_engine.clear_ledger()
 
 @app.post("/ledger/add")
-def add_transaction(item: TransactionRequest):
+def add_transaction(item: TransactionRequest, finance_engine=Depends(get_finance_engine)):
     return finance_engine.add_transaction(item.description, item.amount, item.type)
 
-from .core.market import market_engine
-
 # ...
 
 @app.get("/market")
-def get_market_overview():
-    return market_engine.get_market_data()
+def get_market_overview(market_engine=Depends(get_market_engine)):
+    # Serialized once per tick by the engine; every poller gets the same bytes
+    return Response(content=market_engine.snapshot().json, media_type="application/json")
+
+@app.get("/market/stream")
+async def market_stream(symbols: Optional[str] = None, market_engine=Depends(get_market_engine)):
+    """
+    Live market feed as Server-Sent Events. A 'snapshot' event with the full state comes first,
+    then one 'delta' event per tick with only the fields that changed.
+    `symbols` is an optional comma-separated subset; reconnect to change it.
+    """
+    wanted = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else None
+
+    from .core.market import MarketSubscription
+
+    async def event_stream():
+        subscription = MarketSubscription(market_engine, wanted)
+        try:
+            yield _sse("snapshot", subscription.snapshot())
+            while True:
+                delta = await subscription.changes()
+                if delta is not None:
+                    yield _sse("delta", delta)
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+class LotRequest(BaseModel):
+    symbol: str
+    quantity: float
+    cost: Optional[float] = None # Per unit; defaults to the current price
+
+class HoldingsRequest(BaseModel):
+    lots: list[LotRequest]
+    user_id: str = DEFAULT_USER
+
+@app.get("/portfolio")
+def get_portfolio(user_id: str = DEFAULT_USER, finance_engine=Depends(get_finance_engine)):
+    return finance_engine.portfolio.valuation(user_id)
+
+@app.get("/portfolio/risk")
+def get_portfolio_risk(user_id: str = DEFAULT_USER, window: float = 3600, vol_window: int = 300,
+                       horizon: int = 60, confidence: float = 0.95, finance_engine=Depends(get_finance_engine)):
+    if not 0 < confidence < 1:
+        raise HTTPException(status_code=400, detail="confidence must be between 0 and 1")
+    return finance_engine.portfolio.risk(user_id, window=window, vol_window=max(2, vol_window),
+                                         horizon=max(1, horizon), confidence=confidence)
+
+@app.get("/portfolio/lots")
+def get_portfolio_lots(user_id: str = DEFAULT_USER, symbol: Optional[str] = None,
+                       finance_engine=Depends(get_finance_engine)):
+    return finance_engine.portfolio.list_lots(user_id, symbol)
+
+@app.post("/portfolio/holdings")
+def add_holdings(request: HoldingsRequest, finance_engine=Depends(get_finance_engine)):
+    try:
+        added = finance_engine.portfolio.add_lots([{"symbol": lot.symbol, "quantity": lot.quantity, "cost": lot.cost} for lot in request.lots], request.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"added": added}
+
+@app.delete("/portfolio/holdings/{lot_id}")
+def remove_holding(lot_id: int, user_id: str = DEFAULT_USER, finance_engine=Depends(get_finance_engine)):
+    if not finance_engine.portfolio.remove_lot(lot_id, user_id):
+        raise HTTPException(status_code=404, detail=f"No lot {lot_id}")
+    return {"status": "removed", "id": lot_id}
+
+@app.post("/portfolio/reset")
+def reset_portfolio(user_id: str = DEFAULT_USER, finance_engine=Depends(get_finance_engine)):
+    return {"status": "cleared", "removed": finance_engine.portfolio.clear(user_id)}
+
+@app.get("/market/{symbol}/candles")
+def get_candles(symbol: str, interval: str = "1m", limit: int = 500, market_engine=Depends(get_market_engine)):
+    """OHLC candles as columns: t (bucket start, epoch seconds), open, high, low, close, ticks."""
+    try:
+        candles = market_engine.get_candles(symbol, interval=interval, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if candles is None:
+        raise HTTPException(status_code=404, detail=f"Unknown symbol: {symbol}")
+    return candles
 
 @app.get("/market/{symbol}")
-def get_ticker_details(symbol: str):
-    return market_engine.get_ticker_details(symbol)
+def get_ticker_details(symbol: str, points: int = 200, window: Optional[float] = None,
+                       market_engine=Depends(get_market_engine)):
+    details = market_engine.get_ticker_details(symbol, points=points, window=window)
+    if details is None:
+        raise HTTPException(status_code=404, detail=f"Unknown symbol: {symbol}")
+    return details
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,76 @@
+"""
+Runs the whole benchmark suite and writes one JSON file for comparing commits.
+
+Run from the backend folder:
+    python -m benchmarks                  # everything, results in benchmarks/results/
+    python -m benchmarks --quick          # smaller sizes, for a fast sanity check
+    python -m benchmarks --only masking,market --out before.json
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import os
+import time
+
+from .common import print_table, write_results
+
+def suites(quick: bool):
+    # Imported lazily so --only doesn't pay for suites it skips
+    def masking():
+        from . import bench_masking
+        return bench_masking.run((250, 1000, 4000) if quick else (250, 1000, 4000, 16000))
+
+    def pdf():
+        from . import bench_pdf
+        return bench_pdf.run((1, 10, 40) if quick else (1, 10, 40, 100, 200))
+
+    def vault():
+        from . import bench_vault
+        return bench_vault.run((1000,) if quick else (1000, 10000))
+
+    def ledger():
+        from . import bench_ledger
+        return bench_ledger.run((10000,) if quick else (10000, 100000))
+
+    def market():
+        from . import bench_market
+        return bench_market.run((1000,) if quick else (1000, 21600))
+
+    def startup():
+        from . import bench_startup
+        return bench_startup.run(repeat=1 if quick else 3)
+
+    def load():
+        from . import load
+        latency = 0.05
+        levels = load.run(concurrency=(1, 8) if quick else (1, 8, 32), requests=50 if quick else 200, latency=latency)
+        return {"latency": latency, "levels": levels}
+
+    return {"masking": masking, "pdf": pdf, "vault": vault, "ledger": ledger, "market": market,
+            "startup": startup, "load": load}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer requests")
+    parser.add_argument("--only", help="comma-separated subset: masking,pdf,vault,ledger,market,startup,load")
+    parser.add_argument("--out", help="write JSON results here (default: benchmarks/results/)")
+    args = parser.parse_args()
+    out = os.path.abspath(args.out) if args.out else None
+
+    available = suites(args.quick)
+    names = [n for n in args.only.split(",") if n] if args.only else list(available)
+    unknown = set(names) - set(available)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        results[name] = available[name]()
+        print(f"\n== {name} ({time.perf_counter() - start:.1f}s)")
+        print_table(results[name]["levels"] if name == "load" else results[name])
+
+    path = write_results(results, out)
+    print(f"\nResults written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Ledger costs: single appends, bulk import, keyset page reads and rollup queries.
+
+Run from the backend folder:
+    python -m benchmarks.bench_ledger
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from app.core.ledger import LedgerStore
+from app.core.vault import Vault
+
+from .bench_masking import MERCHANTS
+from .common import per_call, print_table, scratch_dir
+
+def make_rows(n_rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    rows = []
+    for i in range(n_rows):
+        day = start + timedelta(days=i % 365)
+        if i % 30 == 0:
+            rows.append((f"{day.isoformat()} 09:00", "Salary credit", 85000.0, "IN"))
+        else:
+            rows.append((f"{day.isoformat()} 18:30", f"{rng.choice(MERCHANTS)} order {i}", float(rng.randint(50, 5000)), "OUT"))
+    return rows
+
+@scratch_dir()
+def run(sizes=(10000, 100000), appends: int = 500):
+    results = []
+    for n_rows in sizes:
+        vault = Vault(f"bench_ledger_{n_rows}.db")
+        try:
+            ledger = LedgerStore(vault)
+            rows = make_rows(n_rows)
+
+            start = time.perf_counter()
+            ledger.append_many(rows)
+            bulk_seconds = time.perf_counter() - start
+
+            append_ms = per_call(lambda: ledger.append("Coffee", 120.0, "OUT"), appends, repeat=1) * 1000
+            page_ms = per_call(lambda: ledger.page(limit=50), 200) * 1000
+            deep_page_ms = per_call(lambda: ledger.page(limit=50, before_id=n_rows // 2), 200) * 1000
+            stats_ms = per_call(lambda: ledger.rollup.totals(date(2024, 1, 1), date(2024, 12, 31)), 200) * 1000
+
+            start = time.perf_counter()
+            LedgerStore(vault) # Cold start: balance read plus rollup rebuild from the table
+            reload_seconds = time.perf_counter() - start
+
+            results.append({
+                "rows": n_rows,
+                "bulk_rows_per_s": round(n_rows / bulk_seconds),
+                "append_ms": round(append_ms, 3),
+                "page_ms": round(page_ms, 3),
+                "deep_page_ms": round(deep_page_ms, 3),
+                "year_stats_ms": round(stats_ms, 4),
+                "reload_ms": round(reload_seconds * 1000, 1),
+            })
+        finally:
+            vault.close()
+    return results
+
+if __name__ == "__main__":
+    print_table(run())
@@ -0,0 +1,48 @@
+"""
+MarketEngine costs: one tick (GBM step, snapshot serialization, history and candle updates),
+reading a snapshot, ticker details with a downsampled chart, candles, and a feed delta.
+
+Run from the backend folder:
+    python -m benchmarks.bench_market
+"""
+import asyncio
+
+from app.core.market import MarketEngine, MarketSubscription
+
+from .common import per_call, print_table
+
+def _delta_cost(engine: MarketEngine, number: int) -> float:
+    """Seconds per tick to compute one subscriber's delta."""
+    async def measure():
+        subscription = MarketSubscription(engine)
+        subscription.snapshot()
+        loop = asyncio.get_running_loop()
+        total = 0.0
+        for _ in range(number):
+            engine.step()
+            await asyncio.sleep(0) # Let the tick callback set the event
+            start = loop.time()
+            await subscription.changes()
+            total += loop.time() - start
+        subscription.close()
+        return total / number
+    return asyncio.run(measure())
+
+def run(history_ticks=(1000, 21600)):
+    results = []
+    for ticks in history_ticks:
+        engine = MarketEngine(seed=1, history_capacity=ticks)
+        for _ in range(ticks):
+            engine.step()
+        results.append({
+            "history_ticks": ticks,
+            "tick_us": round(per_call(engine.step, 500) * 1e6, 1),
+            "snapshot_us": round(per_call(lambda: engine.snapshot().json, 10000) * 1e6, 3),
+            "details_ms": round(per_call(lambda: engine.get_ticker_details("TCS"), 50) * 1000, 3),
+            "candles_1m_ms": round(per_call(lambda: engine.get_candles("TCS", "1m"), 200) * 1000, 3),
+            "delta_us": round(_delta_cost(engine, 300) * 1e6, 1),
+        })
+    return results
+
+if __name__ == "__main__":
+    print_table(run())
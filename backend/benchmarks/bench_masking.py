@@ -0,0 +1,65 @@
+"""
+Masking and unmasking throughput on synthetic bank statements of growing size.
+
+Run from the backend folder:
+    python -m benchmarks.bench_masking
+
+The per-KB cost should stay flat as the document grows (linear scaling).
+"""
+import random
+import time
+
+from app.core.masking import MaskingEngine
+
+from .common import best_of, print_table
+
+FIRST_NAMES = ["Rahul", "Priya", "Amit", "Sneha", "Vikram", "Anjali", "Karan", "Neha"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Mehta", "Nair", "Singh"]
+MERCHANTS = ["Swiggy", "Zomato", "Amazon", "Netflix", "Uber", "BigBasket", "Airtel", "Myntra"]
+
+def make_statement(n_rows: int, seed: int = 42) -> str:
+    """Builds a fake statement with a realistic density of PII per line."""
+    rng = random.Random(seed)
+    lines = ["Bank Statement for Rahul Sharma", "Account 123456789012 Email rahul.sharma@gmail.com"]
+    for i in range(n_rows):
+        day = 1 + i % 28
+        merchant = rng.choice(MERCHANTS)
+        amount = rng.randint(50, 50000)
+        if i % 10 == 0:
+            who = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            lines.append(f"{day:02d}/01/2024 UPI to {who} +91 98{rng.randint(10000000, 99999999)} Rs {amount}.00")
+        elif i % 25 == 0:
+            lines.append(f"{day:02d}/01/2024 Card 4111 1111 1111 {rng.randint(1000, 9999)} {merchant} Rs {amount}.00")
+        else:
+            lines.append(f"{day:02d}/01/2024 {merchant} purchase Rs {amount}.00")
+    return "\n".join(lines)
+
+def time_mask(text: str, repeat: int = 5) -> float:
+    """Best-of-N wall time (seconds) for masking `text` with a fresh engine."""
+    best = float("inf")
+    for _ in range(repeat):
+        engine = MaskingEngine()
+        start = time.perf_counter()
+        engine.mask(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def time_unmask(text: str, repeat: int = 5) -> float:
+    """Best-of-N wall time (seconds) for unmasking the masked form of `text`."""
+    engine = MaskingEngine()
+    masked, _ = engine.mask(text)
+    return best_of(lambda: engine.unmask(masked), repeat)
+
+def run(sizes=(250, 500, 1000, 2000, 4000, 8000, 16000)):
+    results = []
+    for n_rows in sizes:
+        text = make_statement(n_rows)
+        seconds = time_mask(text)
+        unmask_seconds = time_unmask(text)
+        kb = len(text) / 1024
+        results.append({"rows": n_rows, "kb": round(kb, 1), "ms": round(seconds * 1000, 3),
+                        "us_per_kb": round(seconds * 1e6 / kb, 2), "unmask_ms": round(unmask_seconds * 1000, 3)})
+    return results
+
+if __name__ == "__main__":
+    print_table(run())
@@ -0,0 +1,33 @@
+"""
+PDF text extraction on generated statements of growing page count, serial vs parallel.
+
+Run from the backend folder:
+    python -m benchmarks.bench_pdf
+
+Below PARALLEL_PAGE_THRESHOLD pages both columns use the serial path.
+"""
+from app.core.pdf_parser import PARALLEL_PAGE_THRESHOLD, extract_text_from_pdf
+
+from .bench_masking import make_statement
+from .common import best_of, make_pdf, print_table
+
+LINES_PER_PAGE = 60
+
+def make_statement_pdf(n_pages: int) -> bytes:
+    lines = make_statement(n_pages * LINES_PER_PAGE).splitlines()
+    return make_pdf([lines[i:i + LINES_PER_PAGE] for i in range(0, n_pages * LINES_PER_PAGE, LINES_PER_PAGE)])
+
+def run(pages=(1, 10, 40, 100, 200), repeat: int = 3):
+    results = []
+    for n_pages in pages:
+        pdf = make_statement_pdf(n_pages)
+        serial = best_of(lambda: extract_text_from_pdf(pdf, parallel=False), repeat)
+        parallel = best_of(lambda: extract_text_from_pdf(pdf), repeat)
+        results.append({"pages": n_pages, "kb": round(len(pdf) / 1024, 1),
+                        "serial_ms": round(serial * 1000, 2), "parallel_ms": round(parallel * 1000, 2),
+                        "ms_per_page": round(min(serial, parallel) * 1000 / n_pages, 3),
+                        "parallel_path": n_pages >= PARALLEL_PAGE_THRESHOLD})
+    return results
+
+if __name__ == "__main__":
+    print_table(run())
@@ -0,0 +1,108 @@
+"""
+Cold start profile: time until a fresh `uvicorn app.main:app` answers `/`, import time per
+module (from `python -X importtime`), and how long each lazily built subsystem takes on first use.
+Every measurement runs in a new interpreter, so nothing is warm.
+
+Run from the backend folder:
+    python -m benchmarks.bench_startup            # summary table
+    python -m benchmarks.bench_startup --modules  # plus the slowest imports
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from .common import BACKEND_DIR, print_table, scratch_dir
+
+# Builds every subsystem in a fresh process and prints services.init_times as JSON
+_INIT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app.main
+from app.core import services
+import_ms = (time.perf_counter() - start) * 1000
+services.warm_up()
+services.shutdown()
+print(json.dumps({"import_ms": import_ms, "init": services.init_times}))
+"""
+
+def _env(**extra) -> dict:
+    return dict(os.environ, PYTHONPATH=BACKEND_DIR, **extra)
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def time_to_ready(timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn until GET / returns 200."""
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+                              env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError("server did not come up")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+def import_profile(limit: int = 15):
+    """Slowest modules by cumulative import time for `import app.main`, plus totals per top-level package."""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                            env=_env(), capture_output=True, text=True).stderr
+    modules, packages = [], {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        modules.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1000
+
+    slowest = sorted(modules, key=lambda m: -m["cumulative_ms"])[:limit]
+    by_package = sorted(({"package": p, "self_ms": round(ms, 1)} for p, ms in packages.items()), key=lambda r: -r["self_ms"])
+    return [{**m, "self_ms": round(m["self_ms"], 1), "cumulative_ms": round(m["cumulative_ms"], 1)} for m in slowest], by_package[:limit]
+
+def init_profile() -> dict:
+    """{"import_ms", "init": {subsystem: seconds}} from a fresh process."""
+    output = subprocess.run([sys.executable, "-c", _INIT_SCRIPT], env=_env(PENNYWISE_WARMUP="0"),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+@scratch_dir()
+def run(repeat: int = 3):
+    ready = min(time_to_ready() for _ in range(repeat))
+    profile = init_profile()
+    row = {"ready_ms": round(ready * 1000, 1), "import_ms": round(profile["import_ms"], 1)}
+    for name, seconds in profile["init"].items():
+        row[f"init_{name}_ms"] = round(seconds * 1000, 1)
+    return [row]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", action="store_true", help="also list the slowest imports")
+    parser.add_argument("--repeat", type=int, default=3, help="server starts to take the best of")
+    args = parser.parse_args()
+
+    print_table(run(args.repeat))
+    if args.modules:
+        slowest, by_package = import_profile()
+        print("\nSlowest imports (import app.main):")
+        print_table(slowest)
+        print("\nSelf time per package:")
+        print_table(by_package)
+
+if __name__ == "__main__":
+    main()
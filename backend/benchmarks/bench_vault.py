@@ -0,0 +1,48 @@
+"""
+Vault write and read throughput: batched encrypted inserts, paged history reads and blind-index search.
+
+Run from the backend folder:
+    python -m benchmarks.bench_vault
+"""
+import time
+
+from app.core.vault import Vault
+
+from .common import per_call, print_table, scratch_dir
+
+@scratch_dir()
+def run(sizes=(1000, 10000), page_size: int = 50):
+    results = []
+    for n_events in sizes:
+        vault = Vault(f"bench_vault_{n_events}.db")
+        try:
+            start = time.perf_counter()
+            for i in range(n_events):
+                vault.add_event("user" if i % 2 else "ai", f"Can I afford order {i} from Swiggy for Rs {i % 900 + 100}?")
+            vault.flush()
+            insert_seconds = time.perf_counter() - start
+
+            # Synchronous single writes (queue -> commit -> result), the latency a request sees
+            write_ms = per_call(lambda: vault.execute("INSERT INTO vault_meta (key, value) VALUES ('bench', '1') "
+                                                      "ON CONFLICT(key) DO UPDATE SET value = excluded.value"), 200) * 1000
+
+            newest_ms = per_call(lambda: vault.get_history(limit=page_size), 50) * 1000
+            # A page from the middle of the table, reached by cursor
+            cursor = n_events // 2
+            middle_ms = per_call(lambda: vault.get_history(limit=page_size, before_id=cursor), 50) * 1000
+            search_ms = per_call(lambda: vault.search("swiggy afford", limit=page_size), 50) * 1000
+
+            results.append({
+                "events": n_events,
+                "insert_per_s": round(n_events / insert_seconds),
+                "sync_write_ms": round(write_ms, 3),
+                "page_newest_ms": round(newest_ms, 3),
+                "page_middle_ms": round(middle_ms, 3),
+                "search_ms": round(search_ms, 3),
+            })
+        finally:
+            vault.close()
+    return results
+
+if __name__ == "__main__":
+    print_table(run())
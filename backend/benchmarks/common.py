@@ -0,0 +1,125 @@
+"""
+Shared helpers for the benchmark suite: timers, percentiles, result metadata and a tiny PDF writer.
+"""
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+@contextmanager
+def scratch_dir():
+    """
+    Runs the block in a throwaway working directory, removed afterwards. The app keeps its Vault
+    (pennywise.db + vault.key) in the working directory, so suites that touch it never see real data.
+    Also usable as a decorator.
+    """
+    cwd = os.getcwd()
+    path = tempfile.mkdtemp(prefix="pennywise-bench-")
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(path, ignore_errors=True)
+
+def best_of(fn: Callable[[], object], repeat: int = 5) -> float:
+    """Best wall time (seconds) of `repeat` calls - the least noisy single number."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def per_call(fn: Callable[[], object], number: int, repeat: int = 3) -> float:
+    """Best-of-`repeat` average seconds per call over `number` calls."""
+    return best_of(lambda: [fn() for _ in range(number)], repeat) / number
+
+def percentiles(samples: Sequence[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles, in milliseconds."""
+    if not samples:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(samples)
+    result = {}
+    for p in points:
+        rank = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+        result[f"p{p}"] = round(ordered[rank] * 1000, 3)
+    return result
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+def metadata() -> dict:
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def write_results(results: dict, path: str = None) -> str:
+    """Writes {"meta", "results"} as JSON. Default path: benchmarks/results/<timestamp>-<commit>.json."""
+    meta = metadata()
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{stamp}-{meta['commit']}.json")
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    return path
+
+def print_table(rows: List[dict], columns: Sequence[str] = None):
+    if not rows:
+        return
+    columns = columns or list(rows[0])
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(f"{c:>{widths[c]}}" for c in columns))
+    for r in rows:
+        print("  ".join(f"{str(r.get(c, '')):>{widths[c]}}" for c in columns))
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """
+    Minimal valid PDF with one Helvetica text line per entry, for extraction benchmarks.
+    No third-party writer needed; pypdf reads it like a real statement export.
+    """
+    def escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        content = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({escape(line)}) '" for line in lines) + " ET"
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        kids.append(f"{page_id} 0 R")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
@@ -0,0 +1,72 @@
+"""
+Compares two benchmark JSON files (from `python -m benchmarks`) row by row.
+
+    python -m benchmarks.compare before.json after.json [--threshold 0.10]
+
+Rows are matched on their size/scenario columns. Timings (ms, us, p50...) are better when lower,
+throughputs (per_s, rps) when higher; changes beyond the threshold are flagged.
+"""
+import argparse
+import json
+import sys
+
+# Columns that identify a row rather than measure it
+KEY_COLUMNS = ("scenario", "concurrency", "rows", "pages", "events", "history_ticks", "requests", "kb", "parallel_path")
+HIGHER_IS_BETTER = ("per_s", "rps")
+
+def _rows(results: dict):
+    for suite, data in results.items():
+        rows = data["levels"] if isinstance(data, dict) and "levels" in data else data
+        for row in rows:
+            key = tuple((k, row[k]) for k in KEY_COLUMNS if k in row and k != "kb")
+            yield (suite, key), row
+
+def compare(before: dict, after: dict, threshold: float = 0.10):
+    old_rows = dict(_rows(before["results"]))
+    changes = []
+    for (suite, key), new in _rows(after["results"]):
+        old = old_rows.get((suite, key))
+        if old is None:
+            continue
+        for metric, value in new.items():
+            if metric in KEY_COLUMNS or metric == "errors" or not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            previous = old.get(metric)
+            if not isinstance(previous, (int, float)) or not previous:
+                continue
+            ratio = value / previous
+            better = ratio > 1 if metric.endswith(HIGHER_IS_BETTER) else ratio < 1
+            flag = ""
+            if abs(ratio - 1) > threshold:
+                flag = "faster" if better else "REGRESSION"
+            changes.append({"suite": suite, "row": ", ".join(f"{k}={v}" for k, v in key), "metric": metric,
+                            "before": previous, "after": value, "ratio": round(ratio, 3), "flag": flag})
+    return changes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change worth flagging")
+    parser.add_argument("--all", action="store_true", help="show unflagged metrics too")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before: {before['meta']['commit']} ({before['meta']['timestamp']})")
+    print(f"after:  {after['meta']['commit']} ({after['meta']['timestamp']})\n")
+    changes = compare(before, after, args.threshold)
+    shown = changes if args.all else [c for c in changes if c["flag"]]
+    if not shown:
+        print("No changes beyond the threshold.")
+    for c in shown:
+        print(f"{c['flag'] or '':>10}  {c['suite']:<8} {c['row']:<32} {c['metric']:<16} "
+              f"{c['before']:>12} -> {c['after']:<12} x{c['ratio']}")
+    # Non-zero exit when something got slower, so this can gate a CI step
+    sys.exit(1 if any(c["flag"] == "REGRESSION" for c in changes) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Async load driver for the FastAPI app, in process (httpx ASGITransport, no network or server).
+Gemini is replaced by FakeGeminiModel with a fixed latency, so runs need no API key and are repeatable.
+
+Run from the backend folder:
+    python -m benchmarks.load --concurrency 1,8,32 --requests 200 --latency 0.2
+
+Each scenario is run at each concurrency level by a closed loop of workers; latencies are
+reported as p50/p95/p99 in milliseconds. Needs httpx (already required by FastAPI's TestClient).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+
+import httpx
+
+from app.core import services
+from app.core.gemini_client import FakeGeminiModel
+from app.main import app
+
+from .common import percentiles, print_table, scratch_dir, write_results
+
+# name -> (method, path, request kwargs for the i-th request)
+SCENARIOS = {
+    # Unique messages: every request misses the response cache and waits on the fake model
+    "chat": ("POST", "/chat", lambda i: {"json": {
+        "message": f"Can I afford a Rs {1000 + i} dinner with Rahul Sharma? Call me on 98765{i % 100000:05d}",
+        "session_id": f"load-{i % 16}"}}),
+    # Same message every time: after the first request this is the cache-hit path
+    "chat_cached": ("POST", "/chat", lambda i: {"json": {"message": "Should I cancel my gym membership?"}}),
+    "market": ("GET", "/market", lambda i: {}),
+    "ticker": ("GET", "/market/TCS", lambda i: {}),
+    "ledger": ("GET", "/ledger", lambda i: {"params": {"limit": 50}}),
+    "summary": ("GET", "/finance/summary", lambda i: {}),
+    "portfolio": ("GET", "/portfolio", lambda i: {}),
+}
+
+# Request payload numbers run on across levels, so "chat" never repeats a message (and never hits the cache)
+_sequence = itertools.count()
+
+async def run_level(client: httpx.AsyncClient, scenario: str, concurrency: int, requests: int) -> dict:
+    method, path, make_kwargs = SCENARIOS[scenario]
+    counter = itertools.count()
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **make_kwargs(next(_sequence)))
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        **percentiles(latencies),
+    }
+
+async def run_async(scenarios, concurrency_levels, requests: int, latency: float):
+    services.get_gemini_client().use_model(FakeGeminiModel(latency), "fake")
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://pennywise.local", timeout=120) as client:
+        for scenario in scenarios:
+            # One warm-up request per scenario (imports, caches, lazy pools)
+            method, path, make_kwargs = SCENARIOS[scenario]
+            await client.request(method, path, **make_kwargs(next(_sequence)))
+            for concurrency in concurrency_levels:
+                results.append(await run_level(client, scenario, concurrency, requests))
+    return results
+
+@scratch_dir()
+def run(scenarios=("chat", "chat_cached", "market", "ledger", "summary"), concurrency=(1, 8, 32),
+        requests: int = 200, latency: float = 0.05):
+    try:
+        return asyncio.run(run_async(scenarios, concurrency, requests, latency))
+    finally:
+        # The app's Vault lives in the scratch directory; close it before that goes away
+        services.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="chat,chat_cached,market,ledger,summary",
+                        help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Gemini latency in seconds")
+    parser.add_argument("--out", help="write JSON results here (default: benchmarks/results/)")
+    args = parser.parse_args()
+    out = os.path.abspath(args.out) if args.out else None
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+
+    results = run(scenarios, levels, args.requests, args.latency)
+    print_table(results)
+    path = write_results({"load": {"latency": args.latency, "levels": results}}, out)
+    print(f"\nResults written to {path}")
+
+if __name__ == "__main__":
+    main()
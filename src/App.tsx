@@ -20,6 +20,8 @@ function App() {
     const [roastMode, setRoastMode] = useState(false);
     const [logs, setLogs] = useState<string[]>(["[LOCAL] System Ready."]);
     const [lastPayload, setLastPayload] = useState("");
+    // Scopes the backend's PII token map to this window
+    const [sessionId] = useState(() => crypto.randomUUID());
     const [messages, setMessages] = useState<Message[]>([
         { id: '1', sender: 'bot', text: "Hello! I am PennyWise. Your privacy is my priority." }
     ]);
@@ -33,13 +35,29 @@ function App() {
 
         const formData = new FormData();
         formData.append('file', file);
+        formData.append('session_id', sessionId);
 
         try {
             const response = await fetch('http://127.0.0.1:8000/upload', {
                 method: 'POST',
                 body: formData
             });
-            const data = await response.json();
+            let job = await response.json();
+            if (!response.ok) throw new Error(job.detail || response.statusText);
+            if (job.deduplicated) addLog(`Already analyzed this file - reusing the earlier result`);
+
+            // Analysis runs as a background job; poll until it finishes
+            let lastStage = '';
+            while (job.status === 'queued' || job.status === 'running') {
+                if (job.stage !== lastStage) {
+                    addLog(`Upload ${job.stage}...`);
+                    lastStage = job.stage;
+                }
+                await new Promise(resolve => setTimeout(resolve, 500));
+                job = await (await fetch(`http://127.0.0.1:8000/upload/jobs/${job.job_id}`)).json();
+            }
+            if (job.status === 'failed') throw new Error(job.error);
+            const data = job.result;
 
             if (data.logs) data.logs.forEach((log: string) => addLog(log));
 
@@ -98,6 +116,7 @@ function App() {
                 {activeView === 'chat' && (
                     <ChatWindow
                         roastMode={roastMode}
+                        sessionId={sessionId}
                         addLog={addLog}
                         setLastPayload={setLastPayload}
                         messages={messages}
@@ -13,6 +13,7 @@ interface Message {
 
 interface ChatWindowProps {
     roastMode: boolean;
+    sessionId: string;
     addLog: (log: string) => void;
     setLastPayload: (payload: string) => void;
     messages: Message[];
@@ -20,7 +21,7 @@ interface ChatWindowProps {
     onUploadClick: () => void;
 }
 
-const ChatWindow: React.FC<ChatWindowProps> = ({ roastMode, addLog, setLastPayload, messages, setMessages, onUploadClick }) => {
+const ChatWindow: React.FC<ChatWindowProps> = ({ roastMode, sessionId, addLog, setLastPayload, messages, setMessages, onUploadClick }) => {
     const [input, setInput] = useState("");
     const [isLoading, setIsLoading] = useState(false);
 
@@ -42,34 +43,68 @@ const ChatWindow: React.FC<ChatWindowProps> = ({ roastMode, addLog, setLastPaylo
         setIsLoading(true);
 
         try {
-            // API CALL
-            const response = await fetch('http://127.0.0.1:8000/chat', {
+            // API CALL (streamed as Server-Sent Events)
+            const response = await fetch('http://127.0.0.1:8000/chat/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
                     message: userMsg.text,
-                    mode: roastMode ? 'roast' : 'coach'
+                    mode: roastMode ? 'roast' : 'coach',
+                    session_id: sessionId
                 })
             });
+            if (!response.body) throw new Error("Streaming not supported");
 
-            const data = await response.json();
-
-            // AI Response
-            const botMsg: Message = { id: (Date.now() + 1).toString(), sender: 'bot', text: data.response };
-            setMessages(prev => [...prev, botMsg]);
+            // AI Response - starts empty and grows as delta events arrive
+            const botId = (Date.now() + 1).toString();
+            setMessages(prev => [...prev, { id: botId, sender: 'bot', text: "" }]);
+            setIsLoading(false);
 
-            // Update Glass Box Logs
-            if (data.logs) {
-                data.logs.forEach((log: string) => addLog(log));
+            const appendText = (chunk: string) => {
+                setMessages(prev => prev.map(m => m.id === botId ? { ...m, text: m.text + chunk } : m));
+            };
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                // Events are separated by a blank line; keep any incomplete one in the buffer
+                const events = buffer.split("\n\n");
+                buffer = events.pop() || "";
+
+                for (const rawEvent of events) {
+                    let eventName = "message";
+                    let payload = "";
+                    for (const line of rawEvent.split("\n")) {
+                        if (line.startsWith("event: ")) eventName = line.slice(7);
+                        else if (line.startsWith("data: ")) payload += line.slice(6);
+                    }
+                    if (!payload) continue;
+                    const data = JSON.parse(payload);
+
+                    if (eventName === 'delta') {
+                        appendText(data.text);
+                    } else if (eventName === 'done') {
+                        // Update Glass Box Logs
+                        if (data.logs) {
+                            data.logs.forEach((log: string) => addLog(log));
+                        }
+
+                        // Update Payload View
+                        setLastPayload(JSON.stringify({
+                            user_token: "USER_" + Math.floor(Math.random() * 100),
+                            masked_prompt: data.masked_prompt,
+                            mode: data.mode
+                        }, null, 2));
+                    }
+                }
             }
 
-            // Update Payload View
-            setLastPayload(JSON.stringify({
-                user_token: "USER_" + Math.floor(Math.random() * 100),
-                masked_prompt: data.masked_prompt,
-                mode: data.mode
-            }, null, 2));
-
         } catch (error) {
             console.error(error);
             setMessages(prev => [...prev, { id: Date.now().toString(), sender: 'bot', text: "Error: Could not connect to PennyWise Brain." }]);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 
 interface Transaction {
+    id: number;
     date: string;
     description: string;
     amount: number;
@@ -10,6 +11,7 @@ interface Transaction {
 interface LedgerData {
     balance: number;
     history: Transaction[];
+    next_cursor: number | null;
 }
 
 const LedgerView: React.FC = () => {
@@ -18,13 +20,28 @@ const LedgerView: React.FC = () => {
     const [amount, setAmount] = useState<string>('');
     const [desc, setDesc] = useState<string>('');
     const [loading, setLoading] = useState<boolean>(false);
+    const [nextCursor, setNextCursor] = useState<number | null>(null);
 
     const fetchLedger = async () => {
         try {
-            const res = await fetch('http://127.0.0.1:8000/ledger');
+            const res = await fetch('http://127.0.0.1:8000/ledger?limit=50');
             const data: LedgerData = await res.json();
             setBalance(data.balance);
             setHistory(data.history);
+            setNextCursor(data.next_cursor);
+        } catch (error) {
+            console.error("Error fetching ledger:", error);
+        }
+    };
+
+    // Older pages are appended below the ones already shown (history is newest first)
+    const fetchOlder = async () => {
+        if (nextCursor === null) return;
+        try {
+            const res = await fetch(`http://127.0.0.1:8000/ledger?limit=50&before_id=${nextCursor}`);
+            const data: LedgerData = await res.json();
+            setHistory(prev => [...prev, ...data.history]);
+            setNextCursor(data.next_cursor);
         } catch (error) {
             console.error("Error fetching ledger:", error);
         }
@@ -195,8 +212,8 @@ const LedgerView: React.FC = () => {
                         <div style={{ textAlign: 'center', color: '#94a3b8', padding: '20px' }}>No transactions recorded yet.</div>
                     ) : (
                         <div style={{ display: 'flex', flexDirection: 'column', gap: '10px' }}>
-                            {history.map((tx, idx) => (
-                                <div key={idx} style={{
+                            {history.map((tx) => (
+                                <div key={tx.id} style={{
                                     display: 'flex',
                                     justifyContent: 'space-between',
                                     alignItems: 'center',
@@ -219,6 +236,14 @@ const LedgerView: React.FC = () => {
                                     </div>
                                 </div>
                             ))}
+                            {nextCursor !== null && (
+                                <button
+                                    onClick={fetchOlder}
+                                    style={{ padding: '10px', background: 'transparent', border: '1px solid #cbd5e1', borderRadius: '10px', color: '#475569', cursor: 'pointer' }}
+                                >
+                                    Load older transactions
+                                </button>
+                            )}
                         </div>
                     )}
                 </div>
@@ -25,28 +25,29 @@ interface MarketData {
 interface TickerDetails {
     symbol: string;
     info: Ticker;
-    chart: { time: string; price: number }[];
+    chart: { t: number; time: string; price: number }[];
     about: string;
     key_stats: any;
 }
 
+const MAX_CHART_POINTS = 400;
+
 const StocksView: React.FC = () => {
     const [marketData, setMarketData] = useState<MarketData | null>(null);
     const [selectedTicker, setSelectedTicker] = useState<string | null>(null);
     const [details, setDetails] = useState<TickerDetails | null>(null);
 
-    const fetchMarket = async () => {
-        try {
-            const res = await fetch('http://127.0.0.1:8000/market');
-            const data = await res.json();
-            setMarketData(data);
-            if (!selectedTicker && data.tickers.length > 0) {
-                setSelectedTicker(data.tickers[0].symbol);
-            }
-        } catch (error) {
-            console.error(error);
-        }
-    };
+    // Merges a delta event ({symbol: {field: value}}) into the current ticker list
+    const applyDelta = (data: MarketData, changes: Record<string, Partial<Ticker>>): MarketData => ({
+        ...data,
+        tickers: data.tickers.map(t => {
+            const update = changes[t.symbol];
+            if (!update) return t;
+            const next = { ...t, ...update };
+            next.color = next.change >= 0 ? '#10b981' : '#ef4444';
+            return next;
+        })
+    });
 
     const fetchDetails = async (symbol: string) => {
         try {
@@ -59,16 +60,39 @@ const StocksView: React.FC = () => {
     };
 
     useEffect(() => {
-        fetchMarket();
-        const interval = setInterval(fetchMarket, 3000); // Live poll every 3s
-        return () => clearInterval(interval);
+        // Live feed: one full snapshot, then only the fields that changed each tick
+        const source = new EventSource('http://127.0.0.1:8000/market/stream');
+        source.addEventListener('snapshot', (e) => {
+            const data: MarketData = JSON.parse((e as MessageEvent).data);
+            setMarketData(data);
+            setSelectedTicker(current => current ?? (data.tickers.length > 0 ? data.tickers[0].symbol : null));
+        });
+        source.addEventListener('delta', (e) => {
+            const { tickers } = JSON.parse((e as MessageEvent).data);
+            setMarketData(current => current ? applyDelta(current, tickers) : current);
+        });
+        source.onerror = (error) => console.error(error); // EventSource reconnects on its own
+        return () => source.close();
     }, []);
 
     useEffect(() => {
         if (selectedTicker) {
             fetchDetails(selectedTicker);
         }
-    }, [selectedTicker, marketData]); // Refresh details when market data updates (for price sync)
+    }, [selectedTicker]);
+
+    // Header prices follow the live feed instead of refetching details every tick
+    const liveInfo = details ? (marketData?.tickers.find(t => t.symbol === details.symbol) ?? details.info) : null;
+
+    // Extend the recorded chart with live prices as they arrive (capped so it doesn't grow forever)
+    useEffect(() => {
+        if (!liveInfo || !details) return;
+        const last = details.chart[details.chart.length - 1];
+        if (last && last.price === liveInfo.price) return;
+        const now = new Date();
+        const point = { t: now.getTime() / 1000, time: now.toTimeString().slice(0, 8), price: liveInfo.price };
+        setDetails({ ...details, chart: [...details.chart, point].slice(-MAX_CHART_POINTS) });
+    }, [liveInfo?.price]);
 
     if (!marketData) return <div style={{ padding: 20 }}>Loading Market Data...</div>;
 
@@ -129,20 +153,20 @@ const StocksView: React.FC = () => {
 
             {/* Right Main Panel */}
             <div style={{ flex: 1, background: '#000', color: 'white', overflowY: 'auto', padding: '30px' }}>
-                {details && (
+                {details && liveInfo && (
                     <>
                         {/* Header */}
                         <div style={{ marginBottom: '30px' }}>
                             <div style={{ fontSize: '2.5em', fontWeight: 'bold' }}>{details.symbol}</div>
-                            <div style={{ fontSize: '1.2em', color: '#8e8e93' }}>{details.info.name}</div>
+                            <div style={{ fontSize: '1.2em', color: '#8e8e93' }}>{liveInfo.name}</div>
                             <div style={{ display: 'flex', alignItems: 'baseline', gap: '15px', marginTop: '10px' }}>
-                                <div style={{ fontSize: '2em', fontWeight: '600' }}>{details.info.price.toFixed(2)}</div>
+                                <div style={{ fontSize: '2em', fontWeight: '600' }}>{liveInfo.price.toFixed(2)}</div>
                                 <div style={{
                                     fontSize: '1.2em',
-                                    color: details.info.color,
+                                    color: liveInfo.color,
                                     fontWeight: '500'
                                 }}>
-                                    {details.info.change > 0 ? '+' : ''}{details.info.change.toFixed(2)} ({details.info.pct}%)
+                                    {liveInfo.change > 0 ? '+' : ''}{liveInfo.change.toFixed(2)} ({liveInfo.pct}%)
                                 </div>
                             </div>
                         </div>
@@ -153,8 +177,8 @@ const StocksView: React.FC = () => {
                                 <AreaChart data={details.chart}>
                                     <defs>
                                         <linearGradient id="colorPrice" x1="0" y1="0" x2="0" y2="1">
-                                            <stop offset="5%" stopColor={details.info.color} stopOpacity={0.3} />
-                                            <stop offset="95%" stopColor={details.info.color} stopOpacity={0} />
+                                            <stop offset="5%" stopColor={liveInfo.color} stopOpacity={0.3} />
+                                            <stop offset="95%" stopColor={liveInfo.color} stopOpacity={0} />
                                         </linearGradient>
                                     </defs>
                                     <XAxis dataKey="time" hide />
@@ -166,7 +190,7 @@ const StocksView: React.FC = () => {
                                     <Area
                                         type="monotone"
                                         dataKey="price"
-                                        stroke={details.info.color}
+                                        stroke={liveInfo.color}
                                         fillOpacity={1}
                                         fill="url(#colorPrice)"
                                         strokeWidth={2}
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import '../styles/ChatWindow.css'; // Re-using chat styles for consistency
 
 interface VaultItem {
+    id: number;
     timestamp: string;
     role: string;
     content: string;
@@ -15,15 +16,22 @@ const VaultView: React.FC<VaultViewProps> = ({ onExit }) => {
     const [history, setHistory] = useState<VaultItem[]>([]);
     const [isLoading, setIsLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
+    const [nextCursor, setNextCursor] = useState<number | null>(null);
 
-    useEffect(() => {
-        fetch('http://127.0.0.1:8000/vault/history')
+    // Pages are keyed on the oldest id we have; older pages are prepended
+    const loadPage = (beforeId: number | null) => {
+        const url = beforeId === null
+            ? 'http://127.0.0.1:8000/vault/history?limit=50'
+            : `http://127.0.0.1:8000/vault/history?limit=50&before_id=${beforeId}`;
+        setIsLoading(true);
+        fetch(url)
             .then(res => res.json())
             .then(data => {
-                if (Array.isArray(data)) {
-                    setHistory(data);
+                if (Array.isArray(data.items)) {
+                    setHistory(prev => beforeId === null ? data.items : [...data.items, ...prev]);
+                    setNextCursor(data.next_cursor);
                 } else {
-                    console.error("Vault data is not an array:", data);
+                    console.error("Vault data is not a page:", data);
                     setError("Invalid data format received.");
                 }
                 setIsLoading(false);
@@ -33,6 +41,10 @@ const VaultView: React.FC<VaultViewProps> = ({ onExit }) => {
                 setError("Could not fetch vault history.");
                 setIsLoading(false);
             });
+    };
+
+    useEffect(() => {
+        loadPage(null);
     }, []);
 
     return (
@@ -78,8 +90,17 @@ const VaultView: React.FC<VaultViewProps> = ({ onExit }) => {
                     </div>
                 )}
 
-                {history.map((item, idx) => (
-                    <div key={idx} style={{
+                {nextCursor !== null && !isLoading && (
+                    <button
+                        onClick={() => loadPage(nextCursor)}
+                        style={{ display: 'block', margin: '0 auto 15px', background: 'transparent', border: '1px solid #333', color: '#888', borderRadius: '8px', padding: '6px 12px', cursor: 'pointer' }}
+                    >
+                        Load older entries
+                    </button>
+                )}
+
+                {history.map((item) => (
+                    <div key={item.id} style={{
                         marginBottom: '15px',
                         padding: '10px',
                         background: 'rgba(255,255,255,0.05)',